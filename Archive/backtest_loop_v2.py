@@ -1,6 +1,10 @@
 import os
+import sys
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest_engine import run_backtest
+
 # ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
 
 TIMEFRAME       = "1H"         # timeframe suffix on your Data/*.csv files
@@ -101,30 +105,14 @@ for sym in symbols:
 
     # backtest
     initial_cash = 10_000.0
-    cash = initial_cash
-    position = 0.0
-    trades = []
-    for _, row in df_run.iterrows():
-        price = row['open']
-        if row['signal']=="BUY" and position==0:
-            position = cash/price
-            cash = 0
-            trades.append(('BUY', price))
-        elif row['signal']=="SELL" and position>0:
-            cash = position*price
-            trades.append(('SELL',price))
-            position = 0
-    # exit final
-    if position>0:
-        final_price = df_run.iloc[-1]['close']
-        cash = position*final_price
-        trades.append(('EXIT',final_price))
+    bt = run_backtest(df_run['open'].to_numpy(), df_run['close'].to_numpy(),
+                      df_run['signal'].to_numpy(), initial_cash)
+    cash = bt.final_cash
 
     # metrics
     total_return = (cash-initial_cash)/initial_cash*100
-    num_trades  = len(trades)//2
-    wins = sum(1 for i in range(1,len(trades),2)
-               if trades[i][1] > trades[i-1][1])
+    num_trades  = len(bt.entry_idx)
+    wins = int((bt.exit_price > bt.entry_price).sum())
     win_rate = wins/num_trades*100 if num_trades>0 else 0
 
     results.append({
@@ -1,8 +1,12 @@
 import os
+import sys
 import time
 import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest_engine import run_backtest
+
 # ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
 TIMEFRAME    = "1H"           # timeframe suffix on your Data/*.csv files
 DATA_DIR     = "../Data"  # folder containing SYMBOL_TIMEFRAME.csv
@@ -111,30 +115,13 @@ for sym in symbols:
                        .fillna({'signal':'HOLD'})
 
         # backtest & track equity curve
-        initial_cash   = 10_000.0
-        cash, position = initial_cash, 0.0
-        equity_curve   = []
-
-        for _, row in df_run.iterrows():
-            price = row['open']
-            if row['signal']=="BUY" and position==0:
-                position = cash / price
-                cash     = 0.0
-            elif row['signal']=="SELL" and position>0:
-                cash     = position * price
-                position = 0.0
-
-            equity_curve.append(cash + position * price)
-
-        # final exit if needed
-        if position>0:
-            final_price = df_run.iloc[-1]['close']
-            cash         = position * final_price
-            equity_curve[-1] = cash
-            position     = 0.0
+        initial_cash = 10_000.0
+        bt = run_backtest(df_run['open'].to_numpy(), df_run['close'].to_numpy(),
+                          df_run['signal'].to_numpy(), initial_cash)
+        cash = bt.final_cash
 
         # compute performance metrics
-        portfolio = np.array(equity_curve)
+        portfolio = bt.equity
         ret       = np.diff(portfolio) / portfolio[:-1]
         sharpe    = (ret.mean() / ret.std(ddof=1)) * np.sqrt(8760) if ret.std(ddof=1)>0 else np.nan
         running_max = np.maximum.accumulate(portfolio)
@@ -142,22 +129,8 @@ for sym in symbols:
         max_dd      = drawdowns.min() * 100
 
         # basic trade stats
-        trades      = []
-        cash2, pos2 = initial_cash, 0.0
-        for _, row in df_run.iterrows():
-            price = row['open']
-            if row['signal']=="BUY" and pos2==0:
-                pos2 = cash2 / price; cash2 = 0.0; trades.append(('B',price))
-            elif row['signal']=="SELL" and pos2>0:
-                cash2 = pos2 * price; pos2 = 0.0; trades.append(('S',price))
-        if pos2>0:
-            final_price = df_run.iloc[-1]['close']
-            cash2        = pos2 * final_price
-            trades.append(('E', final_price))
-
-        num_trades = len(trades)//2
-        wins       = sum(1 for i in range(1,len(trades),2)
-                         if trades[i][1] > trades[i-1][1])
+        num_trades = len(bt.entry_idx)
+        wins       = int((bt.exit_price > bt.entry_price).sum())
         win_rate   = wins / num_trades * 100 if num_trades>0 else 0
 
         results.append({
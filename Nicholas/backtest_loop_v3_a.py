@@ -1,8 +1,16 @@
 import os
+import sys
 import time
 import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import candle_store
+from anchor_store import AnchorStore
+from backtest_engine import run_backtest, signal_fingerprint
+from metrics import batch_metrics, periods_per_year
+from signal_engine import grid_signal_codes
+
 # ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
 TIMEFRAME = "1H"  # timeframe suffix on your Data/*.csv files
 DATA_DIR = "../Data"  # folder containing SYMBOL_TIMEFRAME.csv
@@ -32,57 +40,8 @@ SELL_RULES = [
 # ========== STRATEGY ENGINE (DO NOT EDIT BELOW) ==========
 
 def load_candles(symbol: str, timeframe: str) -> pd.DataFrame:
-    """Load OHLC CSV and parse timestamp."""
-    fn = os.path.join(DATA_DIR, f"{symbol}_{timeframe}.csv")
-    df = pd.read_csv(fn)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    return df
-
-
-def generate_signals(df_anc: pd.DataFrame,
-                     buy_rules: list,
-                     sell_rules: list,
-                     pct_dict: dict) -> pd.DataFrame:
-    """Vector-indexed signal generator using precomputed pct changes."""
-    ts = df_anc['timestamp'].to_numpy()
-    n = len(df_anc)
-    signals = []
-
-    for i in range(n):
-        buy_ok, sell_ok = True, False
-
-        # BUY: all buy_rules must pass
-        for r in buy_rules:
-            key = (r['symbol'], r['timeframe'], r['lag'])
-            change = pct_dict[key][i]
-            if pd.isna(change):
-                buy_ok = False
-                break
-            thresh = r['change_pct'] / 100
-            if ((r['direction'] == "up" and change <= thresh) or
-                    (r['direction'] == "down" and change >= thresh)):
-                buy_ok = False
-                break
-
-        # SELL: any sell_rule passes
-        for r in sell_rules:
-            key = (r['symbol'], r['timeframe'], r['lag'])
-            change = pct_dict[key][i]
-            if pd.isna(change):
-                continue
-            thresh = r['change_pct'] / 100
-            if ((r['direction'] == "down" and change <= thresh) or
-                    (r['direction'] == "up" and change >= thresh)):
-                sell_ok = True
-
-        if buy_ok:
-            signals.append("BUY")
-        elif sell_ok:
-            signals.append("SELL")
-        else:
-            signals.append("HOLD")
-
-    return pd.DataFrame({"timestamp": ts, "signal": signals})
+    """Load candles from the binary store (falls back to the CSV in DATA_DIR)."""
+    return candle_store.load_candles(symbol, timeframe, data_dir=DATA_DIR)
 
 
 # === MAIN LOOP ===
@@ -99,95 +58,53 @@ symbols = [
 # symbols = ["AAVE"]
 
 results = []
+evaluated = skipped = 0
+anchor_store = AnchorStore(DATA_DIR)
 
 for sym in symbols:
     # 1) load target
     df_tgt = load_candles(sym, TIMEFRAME)
 
-    # 2) build anchor DataFrame
-    df_anc = pd.DataFrame({'timestamp': df_tgt['timestamp']})
-    for a in ANCHORS:
-        tmp = load_candles(a['symbol'], a['timeframe'])
-        col = f"close_{a['symbol']}_{a['timeframe']}"
-        df_anc = df_anc.merge(
-            tmp[['timestamp', 'close']].rename(columns={'close': col}),
-            on='timestamp', how='left'
-        )
-
-    # 3) PRECOMPUTE all pct-change + shift for every rule combo
-    pct_dict = {}
-    for r in BUY_RULES + SELL_RULES:
-        key = (r['symbol'], r['timeframe'], r['lag'])
-        col = f"close_{r['symbol']}_{r['timeframe']}"
-        pct_dict[key] = df_anc[col].pct_change().shift(r['lag']).to_numpy()
+    # 2) anchor pct-change + shift for every rule, on the target's timeline
+    #    (anchor CSVs and their returns are cached across targets)
+    pct_dict = anchor_store.pct_dict(BUY_RULES + SELL_RULES, df_tgt['timestamp'])
 
-    # 4) parameter sweep & backtest
-    for btc_cp in np.arange(-4.5, 15.5, 1):
-        for eth_cp in np.arange(-2.0, 5.5, 1):  # Loop over ETH_CP from -2.0 to 5.0
-            temp_buy = [{**r, 'change_pct': btc_cp} if r['symbol'] == "BTC" else
-                        {**r, 'change_pct': eth_cp} if r['symbol'] == "ETH" else
-                        r for r in BUY_RULES]
+    # 3) signals for the whole BTC_cp x ETH_CP grid at once
+    btc_grid = np.arange(-4.5, 15.5, 1)
+    eth_grid = np.arange(-2.0, 5.5, 1)  # ETH_CP from -2.0 to 5.0
+    grid_codes = grid_signal_codes(BUY_RULES, SELL_RULES, pct_dict, len(df_tgt),
+                                   {"BTC": btc_grid, "ETH": eth_grid})
 
-            sigs = generate_signals(df_anc, temp_buy, SELL_RULES, pct_dict)
-            df_run = df_tgt.merge(sigs, on='timestamp', how='left') \
-                .fillna({'signal': 'HOLD'})
+    # 4) parameter sweep & backtest
+    #    grid points whose signals give the same trades reuse the same metrics
+    memo = {}
+    for i, btc_cp in enumerate(btc_grid):
+        for j, eth_cp in enumerate(eth_grid):
+            codes = grid_codes[:, i, j]
+            fp = signal_fingerprint(codes)
+            evaluated += 1
+            if fp in memo:
+                skipped += 1
+                results.append({"Symbol": sym, "BTC_cp": btc_cp, "ETH_cp": eth_cp, **memo[fp]})
+                continue
 
-            # backtest & equity curve
+            # backtest & equity curve (pct_dict rows are aligned with df_tgt)
             initial_cash = 10_000.0
-            cash, position = initial_cash, 0.0
-            equity_curve = []
-            for _, row in df_run.iterrows():
-                price = row['open']
-                if row['signal'] == "BUY" and position == 0:
-                    position = cash / price;
-                    cash = 0.0
-                elif row['signal'] == "SELL" and position > 0:
-                    cash = position * price;
-                    position = 0.0
-                equity_curve.append(cash + position * price)
-
-            # final exit
-            if position > 0:
-                final_price = df_run.iloc[-1]['close']
-                cash = position * final_price
-                equity_curve[-1] = cash
-                position = 0.0
+            bt = run_backtest(df_tgt['open'].to_numpy(), df_tgt['close'].to_numpy(),
+                              codes, initial_cash)
+            cash = bt.final_cash
 
             # metrics
-            portfolio = np.array(equity_curve)
-            ret = np.diff(portfolio) / portfolio[:-1]
-            sharpe = (ret.mean() / ret.std(ddof=1)) * np.sqrt(8760) if ret.std(ddof=1) > 0 else np.nan
-            running_max = np.maximum.accumulate(portfolio)
-            drawdowns = (portfolio - running_max) / running_max
-            max_dd = drawdowns.min() * 100
+            m = batch_metrics(bt.equity, periods_per_year(TIMEFRAME))
+            sharpe = m['sharpe'][0]
+            max_dd = m['max_drawdown'][0]
 
             # trade stats
-            trades = []
-            cash2, pos2 = initial_cash, 0.0
-            for _, row in df_run.iterrows():
-                price = row['open']
-                if row['signal'] == "BUY" and pos2 == 0:
-                    pos2 = cash2 / price;
-                    cash2 = 0.0;
-                    trades.append(('B', price))
-                elif row['signal'] == "SELL" and pos2 > 0:
-                    cash2 = pos2 * price;
-                    pos2 = 0.0;
-                    trades.append(('S', price))
-            if pos2 > 0:
-                final_price = df_run.iloc[-1]['close']
-                cash2 = pos2 * final_price
-                trades.append(('E', final_price))
-
-            num_trades = len(trades) // 2
-            wins = sum(1 for i in range(1, len(trades), 2)
-                       if trades[i][1] > trades[i - 1][1])
+            num_trades = len(bt.entry_idx)
+            wins = int((bt.exit_price > bt.entry_price).sum())
             win_rate = wins / num_trades * 100 if num_trades > 0 else 0
 
-            results.append({
-                "Symbol": sym,
-                "BTC_cp": btc_cp,
-                "ETH_cp": eth_cp,  # Add ETH_cp to the results
+            memo[fp] = {
                 "Initial cash": initial_cash,
                 "Final cash": cash,
                 "Total return": (cash - initial_cash) / initial_cash * 100,
@@ -195,11 +112,18 @@ for sym in symbols:
                 "Win rate": win_rate,
                 "Sharpe ratio": sharpe,
                 "Max drawdown": max_dd,
+            }
+            results.append({
+                "Symbol": sym,
+                "BTC_cp": btc_cp,
+                "ETH_cp": eth_cp,  # Add ETH_cp to the results
+                **memo[fp],
             })
 
 # 5) save all results
 pd.DataFrame(results).to_csv(RESULTS_FILE, index=False)
 print(f"✅ Results written to {RESULTS_FILE}")
+print(f"   {skipped} of {evaluated} grid points reused the metrics of an identical signal")
 
 end_time = time.time()
 print(f"⏱ Total processing time: {end_time - start_time:.2f} seconds")
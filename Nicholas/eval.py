@@ -1,5 +1,11 @@
+import os
+import sys
+
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics import perf_scores
+
 def calc_perf_score(inBal, finalBal, mean_return, std_dev_return, high_w, dd):
     """
     Compute a composite performance score based on:
@@ -8,17 +14,10 @@ def calc_perf_score(inBal, finalBal, mean_return, std_dev_return, high_w, dd):
     - Drawdown penalty up to 20 pts      (min required: 5)
     Total score min required: 60 /100
     """
-    # 1) Returns score
-    perc_return   = ((finalBal - inBal) / inBal) * 100
-    returns_score = min(45, max(0, (perc_return / 300) * 45))
-
-    # 2) “Sharpe” score
-    sharpe        = (mean_return - 0.0443) / std_dev_return
-    sharpe_score  = min(35, max(0, (sharpe / 5) * 35))
-
-    # 3) Drawdown score
-    draw_down = (high_w - dd) / high_w * 100
-    dd_score  = max(0, (1 - (draw_down / 50)) * 20)
+    scores = perf_scores(inBal, finalBal, mean_return, std_dev_return, high_w, dd)
+    returns_score = float(scores['returns_score'])
+    sharpe_score  = float(scores['sharpe_score'])
+    dd_score      = float(scores['dd_score'])
 
     # Check against minima
     failed = False
@@ -56,18 +55,14 @@ def main():
     ]
 
     df = pd.DataFrame(data)
-    df['perf_score'] = df.apply(
-        lambda r: calc_perf_score(
-            r['inBal'], r['finalBal'],
-            r['mean_return'], r['std_dev_return'],
-            r['high_w'],    r['dd']
-        ),
-        axis=1
-    )
+    scores = perf_scores(df['inBal'], df['finalBal'], df['mean_return'],
+                         df['std_dev_return'], df['high_w'], df['dd'])
+    df['perf_score'] = scores['total_score']
+    df['passed'] = scores['passed']
 
     print("Results:")
     print(df.to_string(index=False,
-        columns=['inBal','finalBal','mean_return','std_dev_return','high_w','dd','perf_score']
+        columns=['inBal','finalBal','mean_return','std_dev_return','high_w','dd','perf_score','passed']
     ))
 
 if __name__ == "__main__":
@@ -1,29 +1,32 @@
 #!/usr/bin/env python3
-import pandas as pd
+import os
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import results_db
+
+# Thin wrapper over ../results_db.py; for other questions use its CLI, e.g.
+#   python ../results_db.py query --source results_comparison_SOL_SL.csv --where "Final cash>12000"
+
+
 def filter_final_cash(input_file: str, output_file: str, threshold: float = 10000.0):
     """
-    Reads the CSV at input_file, filters rows where 'Final cash' > threshold,
-    and writes the result to output_file.
+    Loads input_file into the results database (skipped when unchanged),
+    selects rows where 'Final cash' > threshold and writes them to output_file.
     """
+    conn = results_db.connect()
     try:
-        # Read the CSV into a DataFrame
-        df = pd.read_csv(input_file)
+        results_db.load(conn, input_file)
+        filtered_df = results_db.query(conn, os.path.basename(input_file),
+                                       where=[("Final cash", ">", threshold)])
     except FileNotFoundError:
         print(f"Error: '{input_file}' not found.", file=sys.stderr)
         sys.exit(1)
-    except pd.errors.EmptyDataError:
-        print(f"Error: '{input_file}' is empty or invalid.", file=sys.stderr)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
-
-    # Ensure the 'Final cash' column exists
-    if "Final cash" not in df.columns:
-        print("Error: Column 'Final cash' not found in the input CSV.", file=sys.stderr)
-        sys.exit(1)
-
-    # Filter rows
-    filtered_df = df[df["Final cash"] > threshold]
+    finally:
+        conn.close()
 
     # Write to output CSV
     filtered_df.to_csv(output_file, index=False)
@@ -1,28 +1,33 @@
 #!/usr/bin/env python3
+import os
 import sys
-import pandas as pd
+from contextlib import closing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import results_db
 
 def summarize_by_entry_cp(filename, threshold):
-    # load data
-    df = pd.read_csv(filename)
+    with closing(results_db.connect()) as conn:
+        # load data (skipped when the database copy is up to date)
+        results_db.load(conn, filename)
+        source = os.path.basename(filename)
 
-    # split into negative and positive Entry_cp (zeros are ignored)
-    groups = {
-        'Negative Entry_cp': df[df['Entry_cp'] < 0],
-        'Positive Entry_cp': df[df['Entry_cp'] > 0]
-    }
+        # split into negative and positive Entry_cp (zeros are ignored)
+        groups = {
+            'Negative Entry_cp': [("Entry_cp", "<", 0)],
+            'Positive Entry_cp': [("Entry_cp", ">", 0)],
+        }
 
-    # for each group, count how many have Final cash > threshold
-    for name, group in groups.items():
-        total = len(group)
-        if total == 0:
-            print(f"{name}: no rows in this category")
-            continue
-        count = (group['Final cash'] > threshold).sum()
-        print(f"{name}: {count} out of {total}, or {count/total*100:.2f}%")
+        # for each group, count how many have Final cash > threshold
+        for name, where in groups.items():
+            total = results_db.count(conn, source, where)
+            if total == 0:
+                print(f"{name}: no rows in this category")
+                continue
+            count = results_db.count(conn, source, where + [("Final cash", ">", threshold)])
+            print(f"{name}: {count} out of {total}, or {count/total*100:.2f}%")
 
 if __name__ == '__main__':
     INPUT_CSV = "results_comparison_SOL_SL.csv"
     THRESHOLD = 12000.0
     summarize_by_entry_cp(INPUT_CSV, THRESHOLD)
-
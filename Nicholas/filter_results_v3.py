@@ -1,55 +1,57 @@
 #!/usr/bin/env python3
+import os
 import sys
-import pandas as pd
+from contextlib import closing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import results_db
+
+# Fixed cutoffs drop configurations that trade one metric for another; for
+# those, see the Pareto front: python ../results_db.py pareto --per-symbol
 
 def analyze_positive_filters(filename,
                              cash_threshold,
                              sharpe_threshold,
                              drawdown_threshold):
-    # load data
-    df = pd.read_csv(filename)
+    with closing(results_db.connect()) as conn:
+        # load data (skipped when the database copy is up to date)
+        results_db.load(conn, filename)
+        _report(conn, os.path.basename(filename),
+                cash_threshold, sharpe_threshold, drawdown_threshold)
+
+def _report(conn, source, cash_threshold, sharpe_threshold, drawdown_threshold):
+    # each step adds one filter and is counted against the previous step
+    steps = [
+        (f"Final cash > {cash_threshold}", ("Final cash", ">", cash_threshold),
+         "No rows passed the Final cash filter, skipping further analysis."),
+        (f"Sharpe ratio > {sharpe_threshold}", ("Sharpe ratio", ">", sharpe_threshold),
+         "No rows passed the Sharpe ratio filter, skipping drawdown analysis."),
+        # i.e. less severe drawdowns
+        (f"Max drawdown > {drawdown_threshold}", ("Max drawdown", ">", drawdown_threshold),
+         "No rows passed the drawdown filter."),
+    ]
 
     # 1) positive Entry_cp
-    pos = df[df['Entry_cp'] > 0]
-    total_pos = len(pos)
-    if total_pos == 0:
+    where = [("Entry_cp", ">", 0)]
+    n_prev = results_db.count(conn, source, where)
+    if n_prev == 0:
         print("No rows with positive Entry_cp found.")
         return
 
-    # 2) Final cash > cash_threshold
-    cash_pass = pos[pos['Final cash'] > cash_threshold]
-    n_cash    = len(cash_pass)
-    pct_cash  = n_cash / total_pos * 100
-    print(f"Final cash > {cash_threshold}: {n_cash} out of {total_pos}, or {pct_cash:.2f}%")
-
-    if n_cash == 0:
-        print("No rows passed the Final cash filter, skipping further analysis.")
-        return
-
-    # 3) Sharpe ratio > sharpe_threshold
-    sharpe_pass = cash_pass[cash_pass['Sharpe ratio'] > sharpe_threshold]
-    n_sharpe    = len(sharpe_pass)
-    pct_sharpe  = n_sharpe / n_cash * 100
-    print(f"Sharpe ratio > {sharpe_threshold}: {n_sharpe} out of {n_cash}, or {pct_sharpe:.2f}%")
-
-    if n_sharpe == 0:
-        print("No rows passed the Sharpe ratio filter, skipping drawdown analysis.")
-        return
-
-    # 4) Max drawdown > drawdown_threshold (i.e. less severe drawdowns)
-    dd_pass    = sharpe_pass[sharpe_pass['Max drawdown'] > drawdown_threshold]
-    n_dd       = len(dd_pass)
-    pct_dd     = n_dd / n_sharpe * 100
-    print(f"Max drawdown > {drawdown_threshold}: {n_dd} out of {n_sharpe}, or {pct_dd:.2f}%")
-
-    if n_dd == 0:
-        print("No rows passed the drawdown filter.")
-        return
+    # 2) - 4) cash, Sharpe and drawdown filters
+    for label, cond, empty_msg in steps:
+        where.append(cond)
+        n = results_db.count(conn, source, where)
+        print(f"{label}: {n} out of {n_prev}, or {n / n_prev * 100:.2f}%")
+        if n == 0:
+            print(empty_msg)
+            return
+        n_prev = n
 
     # 5) Print unique symbols in the final group
-    unique_symbols = dd_pass['Symbol'].unique()
+    final = results_db.query(conn, source, where, group_by=["Symbol"])
     print("\nUnique symbols in the final group:")
-    for sym in unique_symbols:
+    for sym in final['Symbol']:
         print(sym)
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from candle_store import DATA_DIR, load_arrays
+
+# In-process cache for anchor candles (BTC/ETH/SOL...) and their derived
+# shifted returns, so a sweep over ~180 targets parses each anchor CSV once
+# instead of once per target.
+#
+# Returns are cached on the anchor's own timeline, keyed by
+# (symbol, timeframe, lag), and reindexed onto each target's timestamps.
+# The reindex reproduces the old "merge onto target, then
+# pct_change().shift(lag)" result exactly: wherever the target's last lag+1
+# candles are consecutive anchor candles the cached value is gathered, and
+# the few remaining rows (target start, gaps) are recomputed from the
+# aligned closes.
+
+MAX_CACHE_BYTES = 256 * 2**20
+
+
+def to_ms(ts) -> np.ndarray:
+    """int64 ms timestamps from ms integers or datetime64 values."""
+    ts = np.asarray(ts)
+    if ts.dtype.kind == "M":
+        return ts.astype("datetime64[ms]").astype(np.int64)
+    return ts.astype(np.int64, copy=False)
+
+
+def one_step_returns(close: np.ndarray) -> np.ndarray:
+    """close[i] / close[i-1] - 1, NaN on the first candle (pct_change without filling)."""
+    out = np.full(len(close), np.nan)
+    out[1:] = close[1:] / close[:-1] - 1
+    return out
+
+
+def shift(values: np.ndarray, lag: int) -> np.ndarray:
+    """Like Series.shift(lag) for lag >= 0."""
+    if lag == 0:
+        return values.copy()
+    out = np.full(len(values), np.nan)
+    out[lag:] = values[:-lag]
+    return out
+
+
+class AnchorStore:
+    """
+    LRU cache of anchor series and their shifted returns, bounded by max_bytes.
+
+    - loader(symbol, timeframe) -> (ms timestamps, closes); defaults to the
+      binary candle store, falling back to the CSVs in data_dir
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, max_bytes: int = MAX_CACHE_BYTES, loader=None):
+        self.data_dir = data_dir
+        self.max_bytes = max_bytes
+        self._loader = loader or self._load
+        self._cache = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, symbol: str, timeframe: str):
+        cols = load_arrays(symbol, timeframe, data_dir=self.data_dir)
+        return np.asarray(cols['timestamp']), np.asarray(cols['close'])
+
+    def _get(self, key, build):
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+        value = build()
+        self._cache[key] = value
+        self._nbytes += sum(a.nbytes for a in value)
+        # evict least recently used entries, always keeping the newest one
+        while self._nbytes > self.max_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._nbytes -= sum(a.nbytes for a in old)
+        return value
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def series(self, symbol: str, timeframe: str):
+        """(ms timestamps, closes) of one anchor, loaded once."""
+        return self._get(("series", symbol, timeframe),
+                         lambda: self._loader(symbol, timeframe))
+
+    def returns(self, symbol: str, timeframe: str, lag: int) -> np.ndarray:
+        """pct_change().shift(lag) on the anchor's own timeline."""
+        def build():
+            _, close = self.series(symbol, timeframe)
+            return (shift(one_step_returns(close), lag),)
+        return self._get(("returns", symbol, timeframe, lag), build)[0]
+
+    def reindex(self, symbol: str, timeframe: str, lag: int, ts) -> np.ndarray:
+        """
+        Shifted returns on the target's timestamps.
+
+        Same values as left-merging the anchor close onto ts and calling
+        pct_change().shift(lag) on the merged column.
+        """
+        ts = to_ms(ts)
+        n = len(ts)
+        out = np.full(n, np.nan)
+        a_ts, a_close = self.series(symbol, timeframe)
+        span = lag + 1
+        if len(a_ts) == 0 or n <= span:
+            return out
+        cached = self.returns(symbol, timeframe, lag)
+
+        pos = np.searchsorted(a_ts, ts)
+        pos_c = np.minimum(pos, len(a_ts) - 1)
+        hit = (pos < len(a_ts)) & (a_ts[pos_c] == ts)
+
+        # rows whose previous lag+1 target candles are consecutive anchor candles
+        rows = np.arange(span, n)
+        misses = np.concatenate(([0], np.cumsum(~hit)))
+        contiguous = ((misses[rows + 1] - misses[rows - span]) == 0) & \
+                     (pos_c[rows] - pos_c[rows - span] == span)
+        fast = rows[contiguous]
+        out[fast] = cached[pos_c[fast]]
+
+        # everything else: recompute from the aligned closes
+        slow = rows[~contiguous]
+        if len(slow):
+            aligned = np.where(hit, a_close[pos_c], np.nan)
+            out[slow] = aligned[slow - lag] / aligned[slow - lag - 1] - 1
+        return out
+
+    def pct_dict(self, rules: list, ts) -> dict:
+        """{(symbol, timeframe, lag): shifted returns on ts} for every rule."""
+        ts = to_ms(ts)
+        out = {}
+        for r in rules:
+            key = (r['symbol'], r['timeframe'], r['lag'])
+            if key not in out:
+                out[key] = self.reindex(r['symbol'], r['timeframe'], r['lag'], ts)
+        return out
@@ -0,0 +1,119 @@
+import hashlib
+from typing import NamedTuple
+
+import numpy as np
+
+from signal_engine import BUY, HOLD, SELL
+
+# Array backtester shared by the sweep scripts.
+#
+# Rules (same as the old iterrows loops):
+# - BUY goes all-in at the candle's open, only when flat
+# - SELL liquidates at the candle's open, only when holding
+# - an open position is force-closed at the last candle's close
+
+
+class BacktestResult(NamedTuple):
+    equity: np.ndarray        # portfolio value per candle (marked at the open)
+    entry_idx: np.ndarray     # candle index of every entry
+    exit_idx: np.ndarray      # candle index of every exit (forced exit -> last candle)
+    entry_price: np.ndarray   # fill price of every entry (open)
+    exit_price: np.ndarray    # fill price of every exit (open, or last close if forced)
+    final_cash: float
+    holding: np.ndarray       # True on the candles where a position is open at the open
+
+
+def as_codes(signals) -> np.ndarray:
+    """Accept int8 signal codes or "BUY"/"SELL"/"HOLD" labels and return codes."""
+    signals = np.asarray(signals)
+    if signals.dtype.kind in "iu":
+        return signals.astype(np.int8, copy=False)
+    codes = np.full(len(signals), HOLD, dtype=np.int8)
+    codes[signals == "BUY"] = BUY
+    codes[signals == "SELL"] = SELL
+    return codes
+
+
+def trade_points(codes: np.ndarray):
+    """
+    (entry_idx, exit_idx) of a signal vector, before any forced exit.
+
+    The position after any candle only depends on the last non-HOLD signal
+    (BUY -> holding, SELL -> flat), so entries are BUYs whose previous
+    non-HOLD signal was not a BUY and exits are SELLs that follow a BUY.
+    """
+    ev_idx = np.flatnonzero(codes != HOLD)
+    ev = codes[ev_idx]
+    prev = np.empty_like(ev)
+    if len(ev):
+        prev[0] = SELL  # we start flat
+        prev[1:] = ev[:-1]
+    return ev_idx[(ev == BUY) & (prev != BUY)], ev_idx[(ev == SELL) & (prev == BUY)]
+
+
+def signal_fingerprint(signals) -> bytes:
+    """
+    Digest of the trades a signal vector produces. Two vectors with the same
+    fingerprint give the same backtest on the same candles, even when they
+    differ in redundant BUYs (while holding) or SELLs (while flat).
+    """
+    entry_idx, exit_idx = trade_points(as_codes(signals))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.int64(len(entry_idx)).tobytes())
+    h.update(entry_idx.astype(np.int64).tobytes())
+    h.update(exit_idx.astype(np.int64).tobytes())
+    return h.digest()
+
+
+def run_backtest(opens, closes, signals, initial_cash: float = 10_000.0) -> BacktestResult:
+    """
+    Single-pass long-only backtest over open/close arrays and a signal array.
+
+    Entries and exits come from trade_points; cash is then compounded trade
+    by trade, never candle by candle.
+    """
+    opens = np.asarray(opens, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+    codes = as_codes(signals)
+    n = len(codes)
+
+    # 1) entry / exit candles from the sequence of non-HOLD signals
+    entry_idx, exit_idx = trade_points(codes)
+
+    entry_price = opens[entry_idx]
+    exit_price = opens[exit_idx]
+    forced = len(entry_idx) > len(exit_idx)
+    if forced:
+        exit_idx = np.append(exit_idx, n - 1)
+        exit_price = np.append(exit_price, closes[-1])
+
+    # 2) compound cash per trade
+    n_trades = len(entry_idx)
+    units = np.empty(n_trades)
+    cash_after = np.empty(n_trades + 1)
+    cash = initial_cash
+    cash_after[0] = cash
+    for j in range(n_trades):
+        units[j] = cash / entry_price[j]
+        cash = units[j] * exit_price[j]
+        cash_after[j + 1] = cash
+
+    # 3) equity curve: cash while flat, units * open while holding
+    rows = np.arange(n)
+    trade_id = np.searchsorted(entry_idx, rows, side="right") - 1
+    hold_until = exit_idx.copy()
+    if forced:
+        hold_until[-1] = n  # still holding on the last candle before the forced exit
+    holding = trade_id >= 0
+    holding[holding] = rows[holding] < hold_until[trade_id[holding]]
+
+    closed = exit_idx[:n_trades - int(forced)]
+    done = np.searchsorted(closed, rows, side="right")  # trades completed so far
+    cash_row = np.where(holding, 0.0, cash_after[done])
+    pos_row = np.zeros(n)
+    pos_row[holding] = units[trade_id[holding]]
+    equity = cash_row + pos_row * opens
+    if forced:
+        equity[-1] = cash
+
+    return BacktestResult(equity, entry_idx, exit_idx, entry_price, exit_price, float(cash), holding)
@@ -0,0 +1,316 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# Columnar binary candle store.
+#
+# Layout: Store/<TIMEFRAME>/<SYMBOL>/ holds one .npy file per column:
+# `timestamp.npy`, an int64 column of ms since epoch (sorted, unique), and
+# float64 `open.npy` ... `volume.npy`. The files are opened as read-only
+# memory maps, so loading the whole universe only maps files instead of
+# parsing text. (Series written before the split keep a (5, n) `ohlcv.npy`
+# block; they are still read, and rewritten per column when appended to.)
+#
+# New candles are appended in place (append_series): the rows are written
+# after the end of every column file, then each file's .npy header, which
+# np.save pads so the length can grow without moving the data, is rewritten
+# with the new length, timestamp.npy last. Readers take the shortest column,
+# so they see either the old or the new series, never a partial row.
+#
+# Build it once from the CSVs with `python candle_store.py`. Reads fall back
+# to Data/<SYMBOL>_<TIMEFRAME>.csv for series that are not in the store yet.
+#
+# A series converted from a CSV records that CSV's path, size and mtime in
+# `source.json`. Reads only trust the stored copy while the CSV they would
+# otherwise parse (data_dir/<SYMBOL>_<TIMEFRAME>.csv) is that same, unchanged
+# file: after an append by the downloaders, or for another data_dir, the CSV
+# is parsed instead until `python candle_store.py` (or ingest.py) refreshes
+# the store. Series written without a source (resample.py) are trusted
+# unless a CSV for them is newer than the stored copy.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT_DIR, "Data")
+STORE_DIR = os.path.join(ROOT_DIR, "Store")
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = COLUMNS[1:]  # row order of the legacy ohlcv.npy
+SOURCE_NAME = "source.json"
+_DTYPES = {c: np.dtype(np.int64 if c == "timestamp" else np.float64) for c in COLUMNS}
+
+# raw downloader headers -> canonical column names
+CSV_ALIASES = {"open time": "timestamp"}
+
+
+def to_ms(value) -> int:
+    """ms timestamp from an int, a datetime-like or a date string (naive = UTC)."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(np.datetime64(ts.to_datetime64(), "ms").astype(np.int64))
+
+
+def series_dir(symbol: str, timeframe: str, store_dir: str = STORE_DIR) -> str:
+    return os.path.join(store_dir, timeframe.upper(), symbol)
+
+
+def csv_path(symbol: str, timeframe: str, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, f"{symbol}_{timeframe}.csv")
+
+
+def source_stat(path: str) -> dict:
+    """Identity of a source CSV as recorded in source.json."""
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def has_series(symbol: str, timeframe: str, store_dir: str = STORE_DIR) -> bool:
+    return os.path.exists(os.path.join(series_dir(symbol, timeframe, store_dir), "timestamp.npy"))
+
+
+def list_symbols(timeframe: str, store_dir: str = STORE_DIR, data_dir: str = None) -> list:
+    """Symbols stored for a timeframe (plus CSV-only ones in data_dir, if given)."""
+    symbols = set()
+    d = os.path.join(store_dir, timeframe.upper())
+    if os.path.isdir(d):
+        symbols.update(s for s in os.listdir(d)
+                       if not s.endswith(('.tmp', '.old')) and has_series(s, timeframe, store_dir))
+    if data_dir is not None and os.path.isdir(data_dir):
+        suffix = f"_{timeframe}.csv"
+        symbols.update(f[:-len(suffix)] for f in os.listdir(data_dir) if f.endswith(suffix))
+    return sorted(symbols)
+
+
+# ──── CSV parsing ──────────────────────────────────────────────────────────
+
+def read_csv_columns(path: str) -> dict:
+    """
+    Parse one candle CSV (analysis or raw downloader schema) into canonical
+    columns, sorted by timestamp with duplicate timestamps dropped.
+    """
+    df = pd.read_csv(path)
+    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    df.columns = [CSV_ALIASES.get(c.strip().lower(), c.strip().lower()) for c in df.columns]
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    df = df.sort_values('timestamp', kind='stable').drop_duplicates('timestamp', keep='last')
+    cols = {'timestamp': pd.to_numeric(df['timestamp']).to_numpy(np.int64)}
+    for c in PRICE_COLUMNS:
+        cols[c] = pd.to_numeric(df[c], errors='coerce').to_numpy(np.float64)
+    return cols
+
+
+# ──── Writing ──────────────────────────────────────────────────────────────
+
+def replace_dir(tmp: str, final: str):
+    """Swap a fully written directory into place, removing the previous one."""
+    old = final + ".old"
+    if os.path.exists(old):
+        shutil.rmtree(old)
+    if os.path.exists(final):
+        os.rename(final, old)
+    os.rename(tmp, final)
+    if os.path.exists(old):
+        shutil.rmtree(old)
+
+
+def write_series(symbol: str, timeframe: str, columns: dict, store_dir: str = STORE_DIR,
+                 source: str = None):
+    """
+    Replace one stored series. The columns are written into a temporary
+    directory that is then swapped in, so readers never see a half-written
+    series. source is the CSV the columns were read from (see stored_is_current).
+    """
+    lengths = {len(columns[c]) for c in COLUMNS}
+    if len(lengths) != 1:
+        raise ValueError(f"{symbol}_{timeframe}: columns have different lengths {lengths}")
+
+    final = series_dir(symbol, timeframe, store_dir)
+    tmp = final + ".tmp"
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    for c in COLUMNS:
+        np.save(os.path.join(tmp, f"{c}.npy"), np.asarray(columns[c], dtype=_DTYPES[c]))
+    if source is not None:
+        with open(os.path.join(tmp, SOURCE_NAME), "w") as f:
+            json.dump(source_stat(source), f)
+    replace_dir(tmp, final)
+
+
+def _npy_length(f) -> tuple:
+    """(rows, data offset, header version) of the 1-D .npy file open in f."""
+    f.seek(0)
+    version = np.lib.format.read_magic(f)
+    read = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    shape, _, _ = read(f)
+    return shape[0], f.tell(), version
+
+
+def append_series(symbol: str, timeframe: str, columns: dict, store_dir: str = STORE_DIR,
+                  source: str = None) -> int:
+    """
+    Append the rows after the last stored timestamp to a stored series in
+    place (see the layout notes above); earlier rows are ignored. Returns
+    the number of rows appended. source is the CSV the rows were appended
+    to (see stored_is_current).
+    """
+    d = series_dir(symbol, timeframe, store_dir)
+    times = np.asarray(columns['timestamp'], dtype=np.int64)
+    old = load_arrays(symbol, timeframe, store_dir=store_dir, data_dir=None)
+    new = times > old['timestamp'][-1] if len(old['timestamp']) else np.ones(len(times), dtype=bool)
+    if np.any(np.diff(times[new]) <= 0):
+        raise ValueError(f"{symbol}_{timeframe}: appended timestamps are not increasing")
+    if os.path.exists(os.path.join(d, "ohlcv.npy")):
+        # legacy (5, n) block: rewrite per column once
+        write_series(symbol, timeframe, {c: np.concatenate([old[c], np.asarray(columns[c])[new]])
+                                         for c in COLUMNS}, store_dir, source)
+        return int(new.sum())
+    del old
+
+    files = {c: open(os.path.join(d, f"{c}.npy"), 'r+b') for c in COLUMNS}
+    try:
+        lengths = {}
+        for c, f in files.items():
+            rows, offset, _ = _npy_length(f)
+            f.truncate(offset + rows * _DTYPES[c].itemsize)  # drop the rows of an interrupted append
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(np.asarray(columns[c], dtype=_DTYPES[c])[new]).tobytes())
+            lengths[c] = rows
+        n = min(lengths.values()) + int(new.sum())
+        for c in (*PRICE_COLUMNS, 'timestamp'):
+            f = files[c]
+            f.flush()
+            _, offset, version = _npy_length(f)
+            f.seek(0)
+            header = {'descr': np.lib.format.dtype_to_descr(_DTYPES[c]), 'fortran_order': False, 'shape': (n,)}
+            write = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+            write(f, header)
+            if f.tell() != offset:
+                raise RuntimeError(f"{f.name}: no room to grow the .npy header in place")
+    finally:
+        for f in files.values():
+            f.close()
+
+    # touch the series directory (panels compare its mtime), recording the source
+    record = os.path.join(d, SOURCE_NAME)
+    if source is not None:
+        with open(record + ".tmp", "w") as f:
+            json.dump(source_stat(source), f)
+        os.replace(record + ".tmp", record)
+    else:
+        if os.path.exists(record):
+            os.remove(record)
+        os.utime(d)
+    return int(new.sum())
+
+
+def convert_csvs(src_dir: str = DATA_DIR, store_dir: str = STORE_DIR) -> int:
+    """
+    Convert every SYMBOL_TIMEFRAME.csv in src_dir into the store, skipping
+    series already converted from the unchanged CSV; returns the number converted.
+    """
+    converted = 0
+    for fname in sorted(os.listdir(src_dir)):
+        if not fname.lower().endswith('.csv') or '_' not in fname:
+            continue
+        symbol, timeframe = fname[:-4].rsplit('_', 1)
+        path = os.path.join(src_dir, fname)
+        if _recorded_source(symbol, timeframe, store_dir) == source_stat(path):
+            continue
+        try:
+            cols = read_csv_columns(path)
+        except Exception as e:
+            print(f"  [!] Could not convert '{fname}': {e}")
+            continue
+        write_series(symbol, timeframe, cols, store_dir, source=path)
+        converted += 1
+    return converted
+
+
+# ──── Reading ──────────────────────────────────────────────────────────────
+
+def _slice(cols: dict, start, end) -> dict:
+    ts = cols['timestamp']
+    lo = 0 if start is None else int(np.searchsorted(ts, to_ms(start), side='left'))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, to_ms(end), side='left'))
+    return {c: a[lo:hi] for c, a in cols.items()}
+
+
+def _recorded_source(symbol: str, timeframe: str, store_dir: str = STORE_DIR):
+    path = os.path.join(series_dir(symbol, timeframe, store_dir), SOURCE_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def stored_is_current(symbol: str, timeframe: str, store_dir: str = STORE_DIR,
+                      data_dir: str = DATA_DIR) -> bool:
+    """
+    True when a stored series can stand in for data_dir's CSV: there is no
+    such CSV, the series was converted from exactly that unchanged file, or
+    (no recorded source) the CSV is not newer than the stored copy.
+    """
+    d = series_dir(symbol, timeframe, store_dir)
+    if not os.path.exists(os.path.join(d, "timestamp.npy")):
+        return False
+    csv = csv_path(symbol, timeframe, data_dir) if data_dir is not None else None
+    if csv is None or not os.path.exists(csv):
+        return True
+    recorded = _recorded_source(symbol, timeframe, store_dir)
+    if recorded is None:
+        return os.stat(csv).st_mtime_ns <= os.stat(os.path.join(d, "timestamp.npy")).st_mtime_ns
+    return recorded == source_stat(csv)
+
+
+def load_arrays(symbol: str, timeframe: str, start=None, end=None,
+                store_dir: str = STORE_DIR, data_dir: str = DATA_DIR) -> dict:
+    """
+    {column: array} for one series over [start, end).
+
+    Stored series come back as read-only memory-mapped slices (no copy)
+    while they are current for data_dir (see stored_is_current); otherwise,
+    and for series that only exist as CSV, data_dir's CSV is parsed.
+    data_dir=None reads the store only.
+    """
+    d = series_dir(symbol, timeframe, store_dir)
+    if stored_is_current(symbol, timeframe, store_dir, data_dir):
+        cols = {'timestamp': np.load(os.path.join(d, "timestamp.npy"), mmap_mode='r')}
+        if os.path.exists(os.path.join(d, "ohlcv.npy")):
+            cols.update(zip(PRICE_COLUMNS, np.load(os.path.join(d, "ohlcv.npy"), mmap_mode='r')))
+        else:
+            cols.update((c, np.load(os.path.join(d, f"{c}.npy"), mmap_mode='r')) for c in PRICE_COLUMNS)
+        n = min(len(v) for v in cols.values())  # a concurrent append_series grows timestamp.npy last
+        cols = {c: v[:n] for c, v in cols.items()}
+    else:
+        path = csv_path(symbol, timeframe, data_dir) if data_dir is not None else None
+        if path is None or not os.path.exists(path):
+            raise FileNotFoundError(f"No stored series or CSV for {symbol}_{timeframe}")
+        cols = read_csv_columns(path)
+    return _slice(cols, start, end)
+
+
+def load_candles(symbol: str, timeframe: str, start=None, end=None,
+                 store_dir: str = STORE_DIR, data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """OHLCV DataFrame over [start, end) with a parsed `timestamp` column."""
+    cols = load_arrays(symbol, timeframe, start, end, store_dir, data_dir)
+    df = pd.DataFrame({'timestamp': np.asarray(cols['timestamp']).astype('datetime64[ms]')})
+    for c in PRICE_COLUMNS:
+        df[c] = np.asarray(cols[c])
+    return df
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+    n = convert_csvs(DATA_DIR, STORE_DIR)
+    print(f"✅ Converted {n} new or changed CSV files into '{STORE_DIR}'")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
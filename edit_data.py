@@ -1,6 +1,9 @@
 import os
 import pandas as pd
 
+# Superseded by ingest.py, which writes the canonical schema while syncing
+# get_OLHCV_data/Data into Data/. Kept for one-off fixes of old files.
+
 # ─── CONFIGURATION ─────────────────────────────────────────────────────────────
 FOLDER_PATH = 'Data'  # ← your folder
 # ────────────────────────────────────────────────────────────────────────────────
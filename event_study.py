@@ -0,0 +1,162 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from anchor_store import one_step_returns
+from universe_panel import open_panel
+
+# Event study over the whole universe: when an anchor's candle return fell
+# in a threshold bucket `lag` candles ago, what did every target do next?
+#
+# This is the question every rule in the sweeps asks ("BTC moved X% N
+# candles ago -> BUY"), answered for all anchors, buckets, targets and
+# horizons at once, so targets and thresholds can be screened before
+# running the expensive sweeps.
+#
+# An event is a row e where the anchor's one-candle return is in
+# [bucket lo, bucket hi) (in %). The signal fires on row t = e + lag and,
+# like the backtests, enters at that candle's open, taken here as the
+# previous close: forward return at horizon h = close[t-1+h] / close[t-1] - 1.
+#
+# Events are gathered with one searchsorted per anchor and grouped by
+# bucket with a stable argsort; the forward returns of all events and all
+# targets at one horizon are a single gather from the close panel, reduced
+# per bucket with np.add.reduceat (NaN where a target had no candle).
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+TIMEFRAME = "1H"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data")
+RESULTS_FILE = "event_study.csv"
+ANCHORS = ["BTC", "ETH", "SOL"]
+LAGS = [0, 4]                # candles between the anchor move and the signal
+EDGES = np.r_[-np.inf, np.arange(-10, 11, 2), np.inf]  # bucket edges, % move
+HORIZONS = range(1, 25)      # forward horizons, in candles
+QUANTILES = (0.1, 0.5, 0.9)
+MIN_EVENTS = 20              # screening: ignore buckets with fewer events
+
+
+def forward_returns(close: np.ndarray, rows: np.ndarray, h: int) -> np.ndarray:
+    """(len(rows) x S) returns from close[rows] to close[rows + h]; NaN when out of range."""
+    out = np.full((len(rows), close.shape[1]), np.nan)
+    ok = (rows >= 0) & (rows + h < len(close))
+    out[ok] = close[rows[ok] + h] / close[rows[ok]] - 1
+    return out
+
+
+def bucket_events(returns: np.ndarray, edges: np.ndarray):
+    """
+    (rows, bounds): the rows whose return (in %) falls in a bucket, grouped
+    by bucket, and the offsets of each bucket's rows (bucket k is
+    rows[bounds[k]:bounds[k + 1]]).
+    """
+    bucket = np.searchsorted(edges, returns * 100, side='right') - 1
+    ok = ~np.isnan(returns) & (bucket >= 0) & (bucket < len(edges) - 1)
+    rows = np.flatnonzero(ok)
+    order = np.argsort(bucket[rows], kind='stable')
+    rows, bucket = rows[order], bucket[rows][order]
+    bounds = np.searchsorted(bucket, np.arange(len(edges)))
+    return rows, bounds
+
+
+def _bucket_stats(fwd: np.ndarray, bounds: np.ndarray, quantiles) -> dict:
+    """Per-bucket (n_buckets x S) statistics of the forward returns of sorted events."""
+    nb, s = len(bounds) - 1, fwd.shape[1]
+    valid = ~np.isnan(fwd)
+    x = np.where(valid, fwd, 0.0)
+    empty = (bounds[1:] == bounds[:-1])[:, None]
+
+    # count, sum, sum of squares and wins side by side, plus a zero row that
+    # keeps the offsets of trailing empty buckets in range
+    stacked = np.zeros((len(fwd) + 1, 4 * s))
+    stacked[:-1] = np.hstack([valid, x, x * x, fwd > 0])
+    sums = np.where(empty, 0.0, np.add.reduceat(stacked, bounds[:-1], axis=0))
+    n, total, squares, wins = np.split(sums, 4, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        std = np.sqrt(np.maximum(squares - n * mean * mean, 0.0) / (n - 1))
+        hit = wins / n
+
+    # quantiles (linear interpolation): one sort per bucket, NaN sorts last
+    q = np.full((len(quantiles), nb, s), np.nan)
+    cols = np.arange(s)
+    for k in range(nb):
+        block = np.sort(fwd[bounds[k]:bounds[k + 1]], axis=0)
+        count = n[k].astype(np.int64)
+        has = count > 0
+        for i, p in enumerate(quantiles):
+            pos = (count[has] - 1) * p
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, count[has] - 1)
+            a, b = block[lo, cols[has]], block[hi, cols[has]]
+            q[i, k, has] = a + (b - a) * (pos - lo)
+    return {"n": n, "mean": mean, "std": std, "hit": hit, "q": q}
+
+
+def event_study(close: np.ndarray, symbols: list, anchors: list = ANCHORS, lags=LAGS,
+                edges=EDGES, horizons=HORIZONS, quantiles=QUANTILES) -> pd.DataFrame:
+    """
+    Forward-return statistics of every target after every anchor bucket.
+
+    close is an aligned (T x S) close matrix (NaN where a symbol has no
+    candle) whose columns are `symbols`. Returns one row per (anchor, lag,
+    bucket, target, horizon); returns are in %, Excess is the mean minus
+    the target's mean forward return over all rows at that horizon.
+    """
+    close = np.asarray(close, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    col = {s: j for j, s in enumerate(symbols)}
+    nb, s = len(edges) - 1, len(symbols)
+    all_rows = np.arange(len(close))
+    baseline = {h: np.nanmean(forward_returns(close, all_rows, h), axis=0) for h in horizons}
+
+    frames = []
+    for anchor in anchors:
+        rows, bounds = bucket_events(one_step_returns(close[:, col[anchor]]), edges)
+        for lag in lags:
+            entry = rows + lag - 1
+            for h in horizons:
+                st = _bucket_stats(forward_returns(close, entry, h), bounds, quantiles)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    t_stat = (st['mean'] - baseline[h]) / (st['std'] / np.sqrt(st['n']))
+                frame = {
+                    "Anchor": anchor,
+                    "Lag": lag,
+                    "Bucket lo": np.repeat(edges[:-1], s),
+                    "Bucket hi": np.repeat(edges[1:], s),
+                    "Target": np.tile(symbols, nb),
+                    "Horizon": h,
+                    "Events": st['n'].ravel().astype(np.int64),
+                    "Mean": st['mean'].ravel() * 100,
+                    "Std": st['std'].ravel() * 100,
+                    "Hit rate": st['hit'].ravel() * 100,
+                }
+                for p, qv in zip(quantiles, st['q']):
+                    frame[f"P{round(p * 100)}"] = qv.ravel() * 100
+                frame["Excess"] = (st['mean'] - baseline[h]).ravel() * 100
+                frame["t-stat"] = t_stat.ravel()
+                frames.append(pd.DataFrame(frame))
+    return pd.concat(frames, ignore_index=True)
+
+
+def screen(study: pd.DataFrame, horizon: int, min_events: int = MIN_EVENTS, top: int = 20) -> pd.DataFrame:
+    """Rows at one horizon with the strongest excess mean (by |t-stat|)."""
+    rows = study[(study['Horizon'] == horizon) & (study['Events'] >= min_events)]
+    return rows.reindex(rows['t-stat'].abs().sort_values(ascending=False).index).head(top)
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+
+    panel = open_panel(TIMEFRAME, data_dir=DATA_DIR)
+    study = event_study(panel.values('close'), panel.symbols)
+    study.to_csv(RESULTS_FILE, index=False)
+    print(f"✅ {len(study)} rows written to {RESULTS_FILE}")
+
+    h = max(HORIZONS)
+    print(f"\nStrongest responses at {h} candles ({MIN_EVENTS}+ events):")
+    print(screen(study, h).to_string(index=False))
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
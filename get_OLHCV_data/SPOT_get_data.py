@@ -6,7 +6,9 @@ import ssl
 import os
 import pandas as pd
 
-def process_data_for_symbol(host_url, symbol, interval, output_folder):
+from manifest import Manifest
+
+def process_data_for_symbol(host_url, symbol, interval, output_folder, manifest=None):
     headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
 
     # Set end_date as timezone-aware datetime object (UTC)
@@ -24,18 +26,17 @@ def process_data_for_symbol(host_url, symbol, interval, output_folder):
 
     # Build the filename with uppercase interval
     filename = f"{base_symbol}_{interval.upper()}.csv"
-    csv_file_path = os.path.join(output_folder, filename)
 
-    # Determine where to start from
-    if os.path.exists(csv_file_path) and os.path.getsize(csv_file_path) > 0:
-        existing_data = pd.read_csv(csv_file_path, usecols=['Open time'])
-        last_ts = int(existing_data['Open time'].max())
+    # Determine where to start from (manifest lookup, no CSV parsing)
+    manifest = manifest or Manifest(output_folder)
+    last_ts = manifest.last_open_time(filename)
+    if last_ts is not None:
         current_date = datetime.fromtimestamp(last_ts / 1000, tz=timezone.utc)
         print(f"Resuming {symbol} from {current_date.isoformat()} (ts={last_ts})")
     else:
-        # start from 1 Jan 2025 UTC
+        # start from 1 May 2024 UTC (the bar opening then is the first one kept)
         current_date = datetime.strptime("01/05/24", "%d/%m/%y").replace(tzinfo=timezone.utc)
-        last_ts = to_ms(current_date)
+        last_ts = to_ms(current_date) - 1
         print(f"Starting {symbol} from {current_date.isoformat()} (ts={last_ts})")
 
     while current_date < end_date:
@@ -61,12 +62,12 @@ def process_data_for_symbol(host_url, symbol, interval, output_folder):
                 if resp.status_code == 429:
                     raise Exception("Rate limit exceeded")
                 data = resp.json()
-                # drop the last partial bar if present
-                if len(data) > 1:
-                    data = data[:-1]
-                else:
-                    print(f"  [!] Not enough data for {symbol}: {start_time}–{end_time}")
-                    break
+                full_page = len(data) >= 1000
+                # drop the still-forming bar (close time in the future). The bar
+                # opening at endTime comes back again as the first bar of the
+                # next window and is skipped there by the open-time check below.
+                now_ms = to_ms(datetime.now(timezone.utc))
+                data = [row for row in data if row[6] < now_ms]
                 success = True
             except (requests.exceptions.SSLError, ssl.SSLError) as e:
                 retry_count += 1
@@ -84,14 +85,6 @@ def process_data_for_symbol(host_url, symbol, interval, output_folder):
 
         # If we got any bars back, keep only the first 6 fields
         if data:
-            # write headers if new file
-            if not os.path.exists(csv_file_path) or os.path.getsize(csv_file_path) == 0:
-                with open(csv_file_path, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        "Open time", "Open", "High", "Low", "Close", "Volume"
-                    ])
-
             final_arr = []
             for row in data:
                 ts_open = float(row[0])  # ms
@@ -100,17 +93,21 @@ def process_data_for_symbol(host_url, symbol, interval, output_folder):
                     final_arr.append(row[:6])
 
             if final_arr:
-                with open(csv_file_path, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerows(final_arr)
+                # writes the header for a new file and updates the manifest entry
+                manifest.append(filename, final_arr)
                 last_ts = float(final_arr[-1][0])
             else:
                 print(f"  [!] No new rows for {symbol} in this batch")
         else:
             print(f"  [!] Empty data for {symbol} between {current_date} and {next_date}")
 
+        if full_page and data:
+            # the window held more bars than one page: continue after the last one returned
+            next_date = datetime.fromtimestamp(data[-1][0] / 1000, tz=timezone.utc)
         current_date = next_date
 
+    manifest.save(force=True)
+
 
 def read_and_clean_csv(filepath):
     df = pd.read_csv(filepath, index_col=False)
@@ -155,6 +152,9 @@ if __name__ == "__main__":
     with open('Symbols/spot_binance_symbols.csv', 'r') as f:
         symbols = [row[0].strip() for row in csv.reader(f)]
 
+    # Resume points for every file, shared across symbols
+    manifest = Manifest(data_folder)
+
     for interval in intervals:
         # set the global days_gap for the fetch function
         days_gap = days_gap_mapping.get(interval, 1000)
@@ -162,7 +162,7 @@ if __name__ == "__main__":
 
         for symbol in symbols:
             try:
-                process_data_for_symbol(host_url, symbol, interval, data_folder)
+                process_data_for_symbol(host_url, symbol, interval, data_folder, manifest)
             except Exception as e:
                 print(f"Error on {symbol}: {e}")
                 continue
@@ -0,0 +1,247 @@
+import asyncio
+import csv
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import aiohttp
+
+from manifest import Manifest
+
+# Concurrent version of SPOT_get_data.py.
+#
+# Every (symbol, interval) file is split into pages of PAGE_LIMIT candles that
+# are fetched concurrently over one pooled aiohttp session. A shared token
+# bucket keeps the whole run inside the exchange's request-weight budget and
+# backs off when the server answers 429/418. Pages of one file are written in
+# order: a file stops at its first page that keeps failing, so a later run
+# resumes from the last written candle without leaving holes. Resume points
+# come from Data/manifest.json (see manifest.py), not from re-reading CSVs.
+#
+# Point HOST at a local KlineStubServer (kline_stub_server.py) to try it
+# without touching the real API.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+HOST = "https://api.binance.com"
+PREFIX = "/api/v3/klines"
+INTERVALS = ['1h']              # 4H / 1D are derived locally by ../resample.py
+DATA_FOLDER = "Data"
+SYMBOLS_FILE = "Symbols/spot_binance_symbols.csv"
+START_DATE = "01/05/24"       # dd/mm/yy, UTC, for files that do not exist yet
+
+PAGE_LIMIT = 1000             # candles per request (API maximum)
+KLINES_WEIGHT = 2             # request weight of one /klines call with limit 1000
+WEIGHT_PER_MINUTE = 6000      # exchange budget; keep some headroom for other clients
+MAX_IN_FLIGHT = 16            # concurrent HTTP requests
+MAX_FILES = 8                 # (symbol, interval) files downloaded at the same time
+PREFETCH_PAGES = 8            # pages requested ahead of the one being written, per file
+MAX_RETRIES = 5
+CONNECTION_LIMIT = 32
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000,
+    '1w': 604_800_000,
+}
+
+
+class WeightBucket:
+    """
+    Token bucket over the request-weight budget, shared by every request.
+
+    Tokens refill continuously at capacity per `per_seconds`. The server's
+    X-MBX-USED-WEIGHT-1M header is folded back in with observe_used(), and a
+    429/418 answer empties the bucket until its Retry-After has passed.
+    """
+
+    def __init__(self, capacity: int = WEIGHT_PER_MINUTE, per_seconds: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, weight: int):
+        """Wait until `weight` tokens are available and take them."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= weight:
+                        self.tokens -= weight
+                        return
+                    delay = (weight - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def observe_used(self, used: int):
+        """Never hold more tokens than the server says are left this minute."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def block(self, seconds: float):
+        """Stop issuing requests for `seconds` (server asked us to back off)."""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = now
+
+
+def base_name(symbol: str) -> str:
+    return symbol[:-4] if symbol.endswith("USDT") else symbol
+
+
+def file_name(symbol: str, interval: str) -> str:
+    return f"{base_name(symbol)}_{interval.upper()}.csv"
+
+
+def file_path(symbol: str, interval: str, output_folder: str) -> str:
+    return os.path.join(output_folder, file_name(symbol, interval))
+
+
+def plan_windows(start_ms: int, end_ms: int, interval: str, limit: int = PAGE_LIMIT) -> list:
+    """Non-overlapping [start, end) windows of at most `limit` candles."""
+    span = INTERVAL_MS[interval] * limit
+    return [(s, min(s + span, end_ms)) for s in range(start_ms, end_ms, span)]
+
+
+# ──── Fetching ─────────────────────────────────────────────────────────────
+
+async def request_json(session, bucket: WeightBucket, in_flight: asyncio.Semaphore,
+                       url: str, params: dict = None, weight: int = KLINES_WEIGHT):
+    """
+    Rate-limited GET with retries; raises after MAX_RETRIES network / 5xx
+    errors. A 429/418 answer is not an attempt: the bucket is blocked for
+    its Retry-After and the request is queued again. Any other 4xx (bad
+    symbol or parameter, forbidden...) raises at once, since a retry gets
+    the same answer.
+    """
+    attempt = 0
+    while True:
+        await bucket.acquire(weight)
+        try:
+            async with in_flight:
+                async with session.get(url, params=params) as resp:
+                    used = resp.headers.get("X-MBX-USED-WEIGHT-1M")
+                    if used is not None:
+                        bucket.observe_used(int(used))
+                    if resp.status in (418, 429):
+                        bucket.block(float(resp.headers.get("Retry-After", 1)))
+                        continue
+                    if 400 <= resp.status < 500:
+                        raise RuntimeError(f"{url} {params}: HTTP {resp.status} {await resp.text()}")
+                    resp.raise_for_status()
+                    return await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            attempt += 1
+            if attempt >= MAX_RETRIES:
+                raise RuntimeError(f"{url} {params}: failed after {MAX_RETRIES} attempts ({e})") from e
+            print(f"  [!] {url} {params}: {e} (retry {attempt}/{MAX_RETRIES})")
+            await asyncio.sleep(min(2 ** attempt, 30))
+
+
+async def fetch_window(session, bucket: WeightBucket, in_flight: asyncio.Semaphore,
+                       url: str, symbol: str, interval: str, start: int, end: int) -> list:
+    """Klines with open time in [start, end)."""
+    params = {"symbol": symbol, "interval": interval, "startTime": start,
+              "endTime": end - 1, "limit": PAGE_LIMIT}
+    return await request_json(session, bucket, in_flight, url, params, KLINES_WEIGHT)
+
+
+async def backfill_file(session, bucket: WeightBucket, in_flight: asyncio.Semaphore,
+                        url: str, symbol: str, interval: str, manifest: Manifest,
+                        start_ms: int, now_ms: int) -> int:
+    """Download one (symbol, interval) file; returns the number of rows appended."""
+    step = INTERVAL_MS[interval]
+    fname = file_name(symbol, interval)
+    last_ts = manifest.last_open_time(fname)
+    first = start_ms if last_ts is None else last_ts + step
+    windows = deque(plan_windows(first, now_ms, interval))
+    if not windows:
+        return 0
+
+    def submit():
+        s, e = windows.popleft()
+        return asyncio.ensure_future(fetch_window(session, bucket, in_flight, url, symbol, interval, s, e))
+
+    pending = deque(submit() for _ in range(min(PREFETCH_PAGES, len(windows))))
+    written = 0
+    try:
+        while pending:
+            data = await pending.popleft()
+            if windows:
+                pending.append(submit())
+            # drop the still-forming bar (close time in the future)
+            rows = [row[:6] for row in data if row[6] < now_ms]
+            manifest.append(fname, rows)
+            written += len(rows)
+    except Exception as e:
+        print(f"  [!] Stopping {symbol} {interval} after {written} rows: {e}")
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return written
+
+
+async def backfill(symbols: list, intervals: list = INTERVALS,
+                   output_folder: str = DATA_FOLDER, host_url: str = HOST + PREFIX,
+                   start_date: str = START_DATE, bucket: WeightBucket = None,
+                   now_ms: int = None) -> dict:
+    """
+    Download every (symbol, interval) file concurrently, up to now_ms
+    (default: the wall clock); returns {(symbol, interval): rows}.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    manifest = Manifest(output_folder)
+    bucket = bucket or WeightBucket()
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    files = asyncio.Semaphore(MAX_FILES)
+    start_ms = int(datetime.strptime(start_date, "%d/%m/%y").replace(tzinfo=timezone.utc).timestamp() * 1000)
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT)
+    timeout = aiohttp.ClientTimeout(total=60)
+    headers = {'Accept': 'application/json'}
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+        async def one(symbol, interval):
+            async with files:
+                try:
+                    return await backfill_file(session, bucket, in_flight, host_url, symbol,
+                                               interval, manifest, start_ms, now_ms)
+                except Exception as e:
+                    print(f"Error on {symbol} {interval}: {e}")
+                    return 0
+
+        jobs = [(s, i) for i in intervals for s in symbols]
+        try:
+            counts = await asyncio.gather(*(one(s, i) for s, i in jobs))
+        finally:
+            manifest.save(force=True)
+    return dict(zip(jobs, counts))
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+
+    with open(SYMBOLS_FILE, 'r') as f:
+        symbols = [row[0].strip() for row in csv.reader(f)]
+
+    bucket = WeightBucket()
+    counts = asyncio.run(backfill(symbols, bucket=bucket))
+
+    print(f"✅ Appended {sum(counts.values())} candles across {len(counts)} files in '{DATA_FOLDER}'")
+    print(f"   rate limiter waited {bucket.waited:.1f}s in total")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
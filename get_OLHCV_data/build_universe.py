@@ -0,0 +1,140 @@
+import asyncio
+import csv
+import os
+import time
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from async_get_data import CONNECTION_LIMIT, MAX_IN_FLIGHT, WeightBucket, request_json
+
+# Pick the download universe before anything is downloaded.
+#
+# Replaces "write every *USDT pair, download everything, then delete the
+# illiquid ones with filter_low_volume.py":
+#   1. exchangeInfo        -> USDT pairs currently TRADING
+#   2. ticker/24hr         -> one call, drops pairs far below the threshold
+#   3. 1D probe per pair   -> last LOOKBACK_DAYS daily candles: average daily
+#                             quote volume (same measure as filter_low_volume)
+#                             and listing age
+# Pairs that pass are ranked by average quote volume. Symbols/universe.csv
+# keeps the stats of every probed pair; the selected symbols are written to
+# Symbols/spot_binance_symbols.csv, which the downloaders read.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+HOST = "https://api.binance.com"
+OUTPUT_FOLDER = "Symbols"
+UNIVERSE_FILE = "universe.csv"
+SYMBOLS_FILE = "spot_binance_symbols.csv"
+
+QUOTE = "USDT"
+MIN_AVG_QUOTE_VOLUME = 5_500_000   # mean daily quote volume over the lookback
+MIN_DAYS_LISTED = 30               # daily candles required (<= LOOKBACK_DAYS)
+LOOKBACK_DAYS = 90
+PREFILTER_FACTOR = 0.2             # probe pairs whose 24h quote volume >= factor * threshold
+MAX_SYMBOLS = None                 # keep only the top N by volume (None = all that pass)
+EXCLUDE = []                       # e.g. stablecoin pairs like "USDCUSDT"
+
+EXCHANGE_INFO_WEIGHT = 20
+TICKER_ALL_WEIGHT = 80
+KLINES_WEIGHT = 2
+
+
+async def trading_pairs(session, bucket, in_flight, host: str = HOST, quote: str = QUOTE) -> list:
+    info = await request_json(session, bucket, in_flight, host + "/api/v3/exchangeInfo",
+                              weight=EXCHANGE_INFO_WEIGHT)
+    return [s['symbol'] for s in info.get('symbols', [])
+            if s.get('quoteAsset') == quote and s.get('status') == "TRADING"]
+
+
+async def ticker_volumes(session, bucket, in_flight, host: str = HOST) -> dict:
+    """{symbol: 24h quote volume} for every pair, in one request."""
+    rows = await request_json(session, bucket, in_flight, host + "/api/v3/ticker/24hr",
+                              weight=TICKER_ALL_WEIGHT)
+    return {r['symbol']: float(r['quoteVolume']) for r in rows}
+
+
+async def probe_daily(session, bucket, in_flight, symbol: str, host: str = HOST,
+                      lookback: int = LOOKBACK_DAYS) -> dict:
+    """Liquidity stats of one pair from its last `lookback` completed daily candles."""
+    params = {"symbol": symbol, "interval": "1d", "limit": lookback + 1}
+    rows = await request_json(session, bucket, in_flight, host + "/api/v3/klines", params, KLINES_WEIGHT)
+    now_ms = int(time.time() * 1000)
+    rows = [r for r in rows if r[6] < now_ms][-lookback:]  # drop today's forming candle
+    quote_vol = np.array([float(r[7]) for r in rows])
+    return {
+        "days_listed": len(rows),
+        "first_open": int(rows[0][0]) if rows else None,
+        "avg_quote_volume": float(quote_vol.mean()) if len(rows) else 0.0,
+        "median_quote_volume": float(np.median(quote_vol)) if len(rows) else 0.0,
+    }
+
+
+async def build_universe(host: str = HOST,
+                         min_avg_quote_volume: float = MIN_AVG_QUOTE_VOLUME,
+                         min_days_listed: int = MIN_DAYS_LISTED,
+                         lookback: int = LOOKBACK_DAYS,
+                         prefilter_factor: float = PREFILTER_FACTOR,
+                         max_symbols: int = MAX_SYMBOLS,
+                         exclude: list = EXCLUDE,
+                         bucket: WeightBucket = None) -> pd.DataFrame:
+    """Stats of every probed pair, ranked, with a `selected` column."""
+    bucket = bucket or WeightBucket()
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        pairs, volumes = await asyncio.gather(trading_pairs(session, bucket, in_flight, host),
+                                              ticker_volumes(session, bucket, in_flight, host))
+        floor = min_avg_quote_volume * prefilter_factor
+        candidates = [s for s in pairs if s not in exclude and volumes.get(s, 0.0) >= floor]
+        print(f"{len(pairs)} {QUOTE} pairs trading, {len(candidates)} above the 24h prefilter")
+
+        async def probe(symbol):
+            try:
+                return await probe_daily(session, bucket, in_flight, symbol, host, lookback)
+            except Exception as e:
+                print(f"  [!] Could not probe {symbol}: {e}")
+                return None
+
+        stats = await asyncio.gather(*(probe(s) for s in candidates))
+
+    rows = [{"symbol": s, "quote_volume_24h": volumes.get(s, 0.0), **st}
+            for s, st in zip(candidates, stats) if st is not None]
+    df = pd.DataFrame(rows, columns=["symbol", "quote_volume_24h", "days_listed", "first_open",
+                                     "avg_quote_volume", "median_quote_volume"])
+    df = df.sort_values("avg_quote_volume", ascending=False, kind="stable").reset_index(drop=True)
+    df["rank"] = np.arange(1, len(df) + 1)
+    passed = (df["avg_quote_volume"] >= min_avg_quote_volume) & (df["days_listed"] >= min_days_listed)
+    if max_symbols is not None:
+        passed &= passed.cumsum() <= max_symbols
+    df["selected"] = passed
+    return df
+
+
+def write_universe(df: pd.DataFrame, output_folder: str = OUTPUT_FOLDER,
+                   universe_file: str = UNIVERSE_FILE, symbols_file: str = SYMBOLS_FILE):
+    """Persist the stats and the selected symbol list (atomically)."""
+    os.makedirs(output_folder, exist_ok=True)
+    path = os.path.join(output_folder, universe_file)
+    df.to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+    path = os.path.join(output_folder, symbols_file)
+    with open(path + ".tmp", 'w', newline='') as f:
+        writer = csv.writer(f)
+        for symbol in df.loc[df["selected"], "symbol"]:
+            writer.writerow([symbol])
+    os.replace(path + ".tmp", path)
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+    universe = asyncio.run(build_universe())
+    write_universe(universe)
+    print(f"✅ Selected {int(universe['selected'].sum())} of {len(universe)} probed pairs "
+          f"-> {os.path.join(OUTPUT_FOLDER, SYMBOLS_FILE)}")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from async_get_data import (CONNECTION_LIMIT, HOST, INTERVAL_MS, MAX_IN_FLIGHT, PREFIX,
+                            WeightBucket, fetch_window, plan_windows)
+from manifest import HEADER, Manifest, line_terminator
+
+# Gap scanner and targeted refill for the downloaded candle files.
+#
+# A gap is a run of missing candles between two stored ones: consecutive
+# open times further apart than one interval. Each gap is fetched on its own
+# (a handful of requests instead of re-downloading the file) and the new
+# candles are spliced into the file in order, which is then swapped in
+# atomically.
+#
+# Some gaps are real exchange outages; those come back empty and are
+# reported as still missing.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+DATA_FOLDER = "Data"
+INTERVALS = ['1d', '1h', '4h']
+QUOTE = "USDT"    # file names hold the base asset only
+
+
+def find_gaps(open_times, interval: str) -> list:
+    """[(start, end)) ms ranges of candles missing between the first and last open time."""
+    t = np.asarray(open_times, dtype=np.int64)
+    step = INTERVAL_MS[interval]
+    if len(t) < 2:
+        return []
+    t = np.unique(t)
+    holes = np.flatnonzero(np.diff(t) > step)
+    return [(int(t[i]) + step, int(t[i + 1])) for i in holes]
+
+
+def missing_count(gaps: list, interval: str) -> int:
+    step = INTERVAL_MS[interval]
+    return sum((end - start) // step for start, end in gaps)
+
+
+def parse_name(fname: str):
+    """'BTC_1H.csv' -> ('BTCUSDT', '1h'), None for other files."""
+    if not fname.endswith('.csv') or '_' not in fname:
+        return None
+    base, interval = fname[:-4].rsplit('_', 1)
+    interval = interval.lower()
+    if interval not in INTERVAL_MS:
+        return None
+    return base + QUOTE, interval
+
+
+def scan_folder(folder: str = DATA_FOLDER, intervals: list = INTERVALS) -> dict:
+    """{(symbol, interval): gaps} for every file in folder that has at least one gap."""
+    found = {}
+    for fname in sorted(os.listdir(folder)):
+        parsed = parse_name(fname)
+        if parsed is None or parsed[1] not in intervals:
+            continue
+        try:
+            times = pd.read_csv(os.path.join(folder, fname), usecols=['Open time'])['Open time']
+        except Exception as e:
+            print(f"  [!] Could not read '{fname}': {e}")
+            continue
+        gaps = find_gaps(times.to_numpy(), parsed[1])
+        if gaps:
+            found[parsed] = gaps
+    return found
+
+
+def splice_rows(path: str, rows: list) -> int:
+    """
+    Merge fetched rows into a CSV in open-time order, keeping the file's line
+    terminator; returns the number of new candles.
+    """
+    if not rows:
+        return 0
+    old = pd.read_csv(path, dtype=str)
+    old = old.loc[:, ~old.columns.str.contains('^Unnamed')]
+    new = pd.DataFrame([[str(v) for v in r[:6]] for r in rows], columns=HEADER)
+    merged = pd.concat([old, new], ignore_index=True)
+    merged['_t'] = merged['Open time'].astype(np.int64)
+    merged = merged.sort_values('_t', kind='stable').drop_duplicates('_t', keep='first')
+    added = len(merged) - len(old)
+
+    tmp = path + ".tmp"
+    merged.drop(columns='_t').to_csv(tmp, index=False, lineterminator=line_terminator(path))
+    os.replace(tmp, path)
+    return added
+
+
+async def refill_file(session, bucket: WeightBucket, in_flight: asyncio.Semaphore, url: str,
+                      symbol: str, interval: str, path: str, gaps: list) -> int:
+    """Fetch only the missing ranges of one file and splice them in."""
+    windows = [w for start, end in gaps for w in plan_windows(start, end, interval)]
+    pages = await asyncio.gather(*(fetch_window(session, bucket, in_flight, url, symbol, interval, s, e)
+                                   for s, e in windows))
+    return splice_rows(path, [row for page in pages for row in page])
+
+
+async def repair(gaps_by_file: dict, folder: str = DATA_FOLDER,
+                 host_url: str = HOST + PREFIX, bucket: WeightBucket = None) -> dict:
+    """Refill every file in {(symbol, interval): gaps}; returns {(symbol, interval): candles added}."""
+    bucket = bucket or WeightBucket()
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT)
+    timeout = aiohttp.ClientTimeout(total=60)
+    manifest = Manifest(folder)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def one(symbol, interval, gaps):
+            fname = f"{symbol[:-len(QUOTE)]}_{interval.upper()}.csv"
+            try:
+                added = await refill_file(session, bucket, in_flight, host_url, symbol, interval,
+                                          os.path.join(folder, fname), gaps)
+            except Exception as e:
+                print(f"  [!] Could not refill {symbol} {interval}: {e}")
+                return 0
+            if added:
+                manifest.refresh(fname)  # the file was rewritten, not appended to
+            return added
+
+        keys = list(gaps_by_file)
+        try:
+            added = await asyncio.gather(*(one(s, i, gaps_by_file[(s, i)]) for s, i in keys))
+        finally:
+            manifest.save(force=True)
+    return dict(zip(keys, added))
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+
+    gaps = scan_folder(DATA_FOLDER, INTERVALS)
+    total = sum(missing_count(g, i) for (_, i), g in gaps.items())
+    print(f"Found {total} missing candles in {len(gaps)} files")
+    for (symbol, interval), g in gaps.items():
+        print(f"  {symbol} {interval}: {len(g)} gaps, {missing_count(g, interval)} candles")
+
+    if gaps:
+        added = asyncio.run(repair(gaps))
+        still = total - sum(added.values())
+        print(f"✅ Spliced in {sum(added.values())} candles ({still} still missing, likely exchange outages)")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
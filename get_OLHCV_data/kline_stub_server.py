@@ -0,0 +1,195 @@
+import json
+import math
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Local stand-in for the Binance spot REST API, for exercising the
+# downloaders without touching the network.
+#
+# Serves deterministic synthetic klines on /api/v3/klines (plus the matching
+# /api/v3/exchangeInfo and /api/v3/ticker/24hr), emulates the request-weight
+# budget (X-MBX-USED-WEIGHT-1M header, 429 + Retry-After when the minute
+# budget is exceeded) and records every request it saw.
+#
+#   server = KlineStubServer(weight_limit=1200)
+#   base_url = server.start()        # e.g. "http://127.0.0.1:53211"
+#   ...point a downloader at base_url + "/api/v3/klines"...
+#   server.stop()
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000,
+    '1w': 604_800_000,
+}
+WEIGHTS = {"/api/v3/klines": 2, "/api/v3/exchangeInfo": 20, "/api/v3/ticker/24hr": 80}
+
+
+def synthetic_kline(symbol: str, interval: str, open_time: int) -> list:
+    """One deterministic kline in Binance's array format."""
+    step = INTERVAL_MS[interval]
+    seed = zlib.crc32(symbol.encode()) % 1000
+    base = 1.0 + seed / 10
+    t = open_time // step
+    o = base * (1 + 0.05 * ((t * 7919 + seed) % 101 - 50) / 50)
+    c = base * (1 + 0.05 * (((t + 1) * 7919 + seed) % 101 - 50) / 50)
+    h, l = max(o, c) * 1.01, min(o, c) * 0.99
+    v = 1000.0 + (t * 31 + seed) % 977
+    return [open_time, f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.8f}",
+            open_time + step - 1, f"{v * c:.8f}", 100, f"{v / 2:.8f}", f"{v * c / 2:.8f}", "0"]
+
+
+class KlineStubServer:
+    """
+    Threaded HTTP server answering kline requests from synthetic data.
+
+    - listings: {symbol: first open time (ms)}; unknown symbols start at default_listing
+    - missing:  set of (symbol, interval, open_time) candles the "exchange" never returns
+    - now_ms:   fixed clock for the newest candle (defaults to the wall clock)
+    - symbols:  trading symbols listed by exchangeInfo / ticker (defaults to the listings keys)
+    - window_seconds: length of the weight window (60 like the real API; shorten it in tests)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, weight_limit: int = 6000,
+                 listings: dict = None, default_listing: int = 1714521600000,
+                 missing: set = None, now_ms: int = None, window_seconds: int = 60,
+                 symbols: list = None):
+        self.host, self.port = host, port
+        self.weight_limit = weight_limit
+        self.listings = listings or {}
+        self.default_listing = default_listing
+        self.missing = missing or set()
+        self.now_ms = now_ms
+        self.window_seconds = window_seconds
+        self.symbols = list(symbols) if symbols is not None else sorted(self.listings)
+        self.requests = []
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._window = None
+        self._used = 0
+        self._httpd = None
+        self._thread = None
+
+    # --- weight accounting ---------------------------------------------------
+
+    def _charge(self, weight: int):
+        """Returns (accepted, used weight in this window, seconds until the window resets)."""
+        with self._lock:
+            now = time.time()
+            window = int(now // self.window_seconds)
+            if window != self._window:
+                self._window, self._used = window, 0
+            reset = math.ceil((window + 1) * self.window_seconds - now)
+            if self._used + weight > self.weight_limit:
+                self.rejected += 1
+                return False, self._used, reset
+            self._used += weight
+            return True, self._used, reset
+
+    # --- data ------------------------------------------------------------------
+
+    def _now(self) -> int:
+        return self.now_ms if self.now_ms is not None else int(time.time() * 1000)
+
+    def klines(self, symbol: str, interval: str, start: int = None, end: int = None,
+               limit: int = 500) -> list:
+        """Like the API: the first `limit` candles from start, or the last `limit` up to end."""
+        step = INTERVAL_MS[interval]
+        listing = self.listings.get(symbol, self.default_listing)
+        end = min(self._now() if end is None else end, self._now())
+        if start is None:
+            start = end // step * step - (limit - 1) * step
+        first = max(start, listing)
+        t = -(-first // step) * step  # first open time on the grid >= first
+        out = []
+        while t <= end and len(out) < limit:
+            if (symbol, interval, t) not in self.missing:
+                out.append(synthetic_kline(symbol, interval, t))
+            t += step
+        return out
+
+    def exchange_info(self) -> dict:
+        return {"symbols": [{"symbol": s, "status": "TRADING", "baseAsset": s[:-4], "quoteAsset": "USDT"}
+                            for s in self.symbols]}
+
+    def tickers(self) -> list:
+        out = []
+        for s in self.symbols:
+            rows = self.klines(s, '1h', limit=24)
+            out.append({"symbol": s, "quoteVolume": f"{sum(float(r[7]) for r in rows):.8f}",
+                        "count": sum(r[8] for r in rows)})
+        return out
+
+    # --- server ----------------------------------------------------------------
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body, headers: dict = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, str(v))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                server.requests.append((url.path, q))
+                if url.path not in WEIGHTS:
+                    return self._reply(404, {"code": -1, "msg": "unknown endpoint"})
+
+                ok, used, reset = server._charge(WEIGHTS[url.path])
+                headers = {"X-MBX-USED-WEIGHT-1M": used}
+                if not ok:
+                    headers["Retry-After"] = reset
+                    return self._reply(429, {"code": -1003, "msg": "Too much request weight used"}, headers)
+                if url.path == "/api/v3/exchangeInfo":
+                    return self._reply(200, server.exchange_info(), headers)
+                if url.path == "/api/v3/ticker/24hr":
+                    return self._reply(200, server.tickers(), headers)
+                try:
+                    rows = server.klines(q["symbol"], q["interval"],
+                                         int(q["startTime"]) if "startTime" in q else None,
+                                         int(q["endTime"]) if "endTime" in q else None,
+                                         min(int(q.get("limit", 500)), 1000))
+                except (KeyError, ValueError) as e:
+                    return self._reply(400, {"code": -1100, "msg": f"bad parameter: {e}"}, headers)
+                self._reply(200, rows, headers)
+
+        return Handler
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL."""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+if __name__ == "__main__":
+    stub = KlineStubServer(port=8765)
+    print(f"Serving synthetic klines on {stub.start()}/api/v3/klines (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,214 @@
+import csv
+import io
+import json
+import os
+import time
+import zlib
+
+# Per-file manifest of the downloaded candle CSVs.
+#
+# Data/manifest.json holds one entry per file:
+#   {"BTC_1H.csv": {"first_ts": ..., "last_ts": ..., "rows": ..., "size": ..., "crc32": ...}}
+# rows excludes the header; size and crc32 cover the file's bytes.
+#
+# Appends go through Manifest.append, which writes the rows and extends the
+# entry from the appended bytes alone (rows and crc32 are updated
+# incrementally), so resuming a download only reads the manifest. The
+# manifest itself is replaced atomically (temp file + rename). An entry
+# whose size no longer matches the file (edited by hand, crash before the
+# manifest was saved) is rebuilt from the file's first line and from its
+# last line, found by seeking back from the end: the rest of the file is
+# not read, so rows and crc32 are unknown (None) until a full scan
+# (verify, or refresh / rebuild with checksum=True) records them.
+
+MANIFEST_NAME = "manifest.json"
+HEADER = ["Open time", "Open", "High", "Low", "Close", "Volume"]
+SAVE_INTERVAL = 1.0  # seconds between manifest writes during a run
+CHUNK = 1 << 20
+NEWLINE = "\r\n"  # csv.writer's default, as written by the original downloader
+
+
+def format_rows(rows: list, newline: str = NEWLINE) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator=newline).writerows(rows)
+    return buf.getvalue().encode()
+
+
+def line_terminator(path: str) -> str:
+    """Line terminator of an existing CSV, from its header line ("\r\n" or "\n")."""
+    with open(path, 'rb') as f:
+        return "\r\n" if f.readline().endswith(b"\r\n") else "\n"
+
+
+def _tail_line(f, size: int) -> bytes:
+    """Last non-empty line of an open binary file, found by seeking back from the end."""
+    pos, tail = size, b""
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        tail = f.read(step) + tail
+        lines = tail.rstrip(b"\r\n").split(b"\n")
+        if len(lines) > 1 or pos == 0:
+            return lines[-1].strip()
+    return b""
+
+
+def scan_file(path: str, checksum: bool = False):
+    """
+    Entry for a CSV from its head and tail lines (seeking to the end, not
+    reading the file). With checksum, rows and crc32 come from one raw byte
+    pass over the whole file (no CSV parsing); otherwise they are None.
+    None for a missing or header-only file.
+    """
+    if not os.path.exists(path):
+        return None
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()                      # header
+        first = f.readline().strip()
+        if not first:
+            return None
+        last = _tail_line(f, size)
+        rows = crc = None
+        if checksum:
+            f.seek(0)
+            crc, newlines, ends_with_newline = 0, 0, True
+            while chunk := f.read(CHUNK):
+                crc = zlib.crc32(chunk, crc)
+                newlines += chunk.count(b"\n")
+                ends_with_newline = chunk.endswith(b"\n")
+            rows = newlines + (0 if ends_with_newline else 1) - 1
+    return {
+        "first_ts": int(float(first.split(b",")[0])),
+        "last_ts": int(float(last.split(b",")[0])),
+        "rows": rows,
+        "size": size,
+        "crc32": crc,
+    }
+
+
+class Manifest:
+    """
+    Resume points and checksums of every CSV in one data folder.
+
+    - entry(fname): the file's entry, rebuilt when it is missing or stale
+    - append(fname, rows): append candle rows (header first for a new file)
+    - refresh(fname): rescan a file rewritten by something else
+    """
+
+    def __init__(self, folder: str, name: str = MANIFEST_NAME, save_interval: float = SAVE_INTERVAL):
+        self.folder = folder
+        self.path = os.path.join(folder, name)
+        self.save_interval = save_interval
+        self._saved_at = 0.0
+        self._dirty = False
+        self._newline = {}  # fname -> line terminator of the file, read once
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f)
+
+    def _file(self, fname: str) -> str:
+        return os.path.join(self.folder, fname)
+
+    def refresh(self, fname: str, checksum: bool = False):
+        self._newline.pop(fname, None)  # a rewrite may change the line endings
+        entry = scan_file(self._file(fname), checksum)
+        if entry is None:
+            self.entries.pop(fname, None)
+        else:
+            self.entries[fname] = entry
+        self._dirty = True
+        return entry
+
+    def entry(self, fname: str):
+        """Manifest entry of fname, or None when the file has no candles yet."""
+        path = self._file(fname)
+        entry = self.entries.get(fname)
+        if not os.path.exists(path):
+            if entry is not None:
+                self.entries.pop(fname)
+                self._dirty = True
+            return None
+        if entry is None or entry["size"] != os.path.getsize(path):
+            return self.refresh(fname)
+        return entry
+
+    def last_open_time(self, fname: str):
+        entry = self.entry(fname)
+        return None if entry is None else entry["last_ts"]
+
+    def append(self, fname: str, rows: list):
+        """Append rows (already in open-time order, after last_ts) and extend the entry."""
+        if not rows:
+            return
+        entry = self.entry(fname)
+        path = self._file(fname)
+        if entry is None:
+            data = format_rows([HEADER]) + format_rows(rows)
+            mode = 'wb'
+            self._newline[fname] = NEWLINE
+            entry = {"first_ts": int(rows[0][0]), "last_ts": None, "rows": 0, "size": 0, "crc32": 0}
+        else:
+            # appends keep the file's own line endings (pandas rewrites use "\n")
+            if fname not in self._newline:
+                self._newline[fname] = line_terminator(path)
+            data = format_rows(rows, self._newline[fname])
+            mode = 'ab'
+        with open(path, mode) as f:
+            f.write(data)
+        # rows / crc32 stay unknown (None) after a tail-only rescan
+        entry.update(last_ts=int(rows[-1][0]),
+                     rows=None if entry["rows"] is None else entry["rows"] + len(rows),
+                     size=entry["size"] + len(data),
+                     crc32=None if entry["crc32"] is None else zlib.crc32(data, entry["crc32"]))
+        self.entries[fname] = entry
+        self._dirty = True
+        self.save()
+
+    def verify(self, fname: str) -> bool:
+        """
+        True when the file's bytes still match its recorded checksum (reads
+        the whole file). An entry without a checksum yet (tail-only rescan)
+        gets the one computed here when its size matches.
+        """
+        entry = self.entries.get(fname)
+        scanned = scan_file(self._file(fname), checksum=True)
+        if entry is None or scanned is None or scanned["size"] != entry["size"]:
+            return False
+        if entry["crc32"] is None:
+            entry.update(rows=scanned["rows"], crc32=scanned["crc32"])
+            self._dirty = True
+            return True
+        return scanned["crc32"] == entry["crc32"]
+
+    def save(self, force: bool = False):
+        """Write the manifest atomically (at most every save_interval seconds unless forced)."""
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._saved_at < self.save_interval):
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self._saved_at = now
+        self._dirty = False
+
+    def rebuild(self, checksum: bool = False) -> int:
+        """Rescan every CSV in the folder (whole files with checksum); returns the number of entries."""
+        self.entries = {}
+        for fname in sorted(os.listdir(self.folder)):
+            if fname.endswith('.csv'):
+                self.refresh(fname, checksum)
+        self.save(force=True)
+        return len(self.entries)
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+    n = Manifest("Data").rebuild()
+    print(f"✅ Rebuilt manifest for {n} files")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
@@ -1,6 +1,9 @@
 import os
 import shutil
 
+# Superseded by ../ingest.py, which syncs Data/ into the analysis folder
+# incrementally (appending new rows instead of skipping existing files).
+
 # ← EDIT THESE to match your setup:
 source_folders = [
     r'4h_binance',
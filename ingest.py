@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from candle_store import COLUMNS, DATA_DIR, ROOT_DIR, STORE_DIR, append_series, has_series, write_series
+
+sys.path.append(os.path.join(ROOT_DIR, "get_OLHCV_data"))
+from manifest import Manifest, scan_file
+
+# Sync the raw downloads (get_OLHCV_data/Data, `Open time,Open,...` schema)
+# into the analysis data (Data/, `timestamp,open,...` schema) and the binary
+# candle store, replacing the edit_data.py / rename_files.py passes.
+#
+# Rows are written in the canonical schema as they are copied. Data/.ingest.json
+# records the size and mtime of every raw file as last ingested, and the
+# crc32 of its edges: its first EDGE bytes and the EDGE bytes before its end.
+#   - same size and mtime       -> the file is skipped without being opened
+#   - grown by appends          -> the edges at the old size still match:
+#                                  only the file from EDGE bytes before that
+#                                  offset is read, rows after the last
+#                                  ingested timestamp are appended
+#   - rewritten (gap refill...) -> the edges differ (splice_rows inserts rows
+#                                  mid-file, shifting the bytes before the
+#                                  old end): the analysis copy is rebuilt once
+# Like the manifest's head/tail check, this trusts the middle of a file that
+# kept its edges: a same-size rewrite of the middle alone goes unnoticed.
+#
+# The first ingest of an existing analysis copy appends after its last row,
+# unless the raw file has more rows up to that row than the copy (holes,
+# e.g. refilled since the copy was made): then the copy is rebuilt.
+#
+# A series already in the binary store is extended in place with the new
+# rows only (candle_store.append_series), or rewritten with the copy.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+SRC_DIR = os.path.join(ROOT_DIR, "get_OLHCV_data", "Data")
+DST_DIR = DATA_DIR
+STATE_NAME = ".ingest.json"
+
+HEADER = b"timestamp,open,high,low,close,Volume\n"
+EDGE = 1 << 16  # bytes checksummed at each edge of a raw file
+
+
+def canonical_rows(raw: bytes, after_ts=None):
+    """
+    Raw CSV bytes -> (canonical CSV bytes, timestamps, [open..volume] values)
+    for the rows with open time > after_ts. Header and blank lines are skipped.
+    """
+    lines, times, values = [], [], []
+    for line in raw.splitlines():
+        fields = line.strip().split(b",")
+        if not fields[0][:1].isdigit():
+            continue
+        ts = int(float(fields[0]))
+        if after_ts is not None and ts <= after_ts:
+            continue
+        fields[0] = str(ts).encode()
+        lines.append(b",".join(fields[:6]))
+        times.append(ts)
+        values.append([float(v) for v in fields[1:6]])
+    data = b"\n".join(lines) + b"\n" if lines else b""
+    return data, np.array(times, dtype=np.int64), np.array(values, dtype=np.float64).reshape(-1, 5)
+
+
+def _extend_store(symbol: str, timeframe: str, times: np.ndarray, values: np.ndarray,
+                  replace: bool, store_dir: str, source: str):
+    """
+    Append (or replace with) the new rows in the binary store, if the series
+    is stored; source is the analysis copy they were written to.
+    """
+    if store_dir is None or not has_series(symbol, timeframe, store_dir):
+        return
+    cols = {'timestamp': times}
+    cols.update({c: values[:, i] for i, c in enumerate(COLUMNS[1:])})
+    if replace:
+        write_series(symbol, timeframe, cols, store_dir, source=source)
+    else:
+        append_series(symbol, timeframe, cols, store_dir, source=source)
+
+
+def _read_tail(path: str, offset: int):
+    """
+    (edge crc32 of the file cut at offset, edge crc32 of the whole file,
+    bytes after offset): only the head and the file from EDGE bytes before
+    offset are read.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(EDGE)
+        start = max(offset - EDGE, 0)
+        f.seek(start)
+        rest = f.read()
+
+    def edge_crc(end):
+        window = rest[max(EDGE, end - EDGE) - start:end - start] if end > EDGE else b""
+        return zlib.crc32(window, zlib.crc32(head[:end]))
+
+    return edge_crc(offset), edge_crc(start + len(rest)), rest[offset - start:]
+
+
+def ingest_file(fname: str, src: Manifest, state: dict, dst_dir: str = DST_DIR,
+                store_dir: str = STORE_DIR) -> int:
+    """Bring one analysis file up to date with its raw download; returns rows written."""
+    entry = src.entry(fname)
+    if entry is None:
+        return 0
+    src_path = os.path.join(src.folder, fname)
+    src_mtime = os.stat(src_path).st_mtime_ns
+    dst_path = os.path.join(dst_dir, fname)
+    dst_size = os.path.getsize(dst_path) if os.path.exists(dst_path) else None
+    prev = state.get(fname)
+    if prev is not None and (prev['dst_size'] != dst_size or 'src_edge_crc32' not in prev):
+        prev = None  # analysis copy changed behind our back (or state from an older version)
+    if prev is not None and (prev['src_size'], prev['src_mtime']) == (entry['size'], src_mtime):
+        return 0
+
+    offset = prev['src_size'] if prev is not None and entry['size'] >= prev['src_size'] else 0
+    old_crc, crc, raw = _read_tail(src_path, offset)
+    if prev is None:
+        # first ingest: keep an existing analysis copy and append after its last
+        # row, unless it lacks raw rows up to that row (holes): then rebuild it
+        scanned = scan_file(dst_path, checksum=True) if dst_size else None
+        dst_last = scanned['last_ts'] if scanned else None
+        appended = dst_last is not None and \
+            int((canonical_rows(raw)[1] <= dst_last).sum()) <= scanned['rows']
+    else:
+        if crc == prev['src_edge_crc32'] and entry['size'] == prev['src_size']:
+            prev['src_mtime'] = src_mtime  # touched, not changed
+            return 0
+        dst_last = prev['dst_last_ts']
+        appended = offset > 0 and old_crc == prev['src_edge_crc32']
+        if not appended and offset:
+            _, crc, raw = _read_tail(src_path, 0)  # rewritten: rebuild from the whole file
+    data, times, values = canonical_rows(raw, dst_last if appended else None)
+
+    if appended:
+        if data:
+            with open(dst_path, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+                f.write(data)
+    else:
+        tmp = dst_path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(HEADER + data)
+        os.replace(tmp, dst_path)
+    if data or not appended:
+        symbol, timeframe = fname[:-4].rsplit('_', 1)
+        _extend_store(symbol, timeframe, times, values, not appended, store_dir, dst_path)
+
+    state[fname] = {
+        "src_size": entry['size'],
+        "src_mtime": src_mtime,
+        "src_edge_crc32": crc,
+        "dst_size": os.path.getsize(dst_path),
+        "dst_last_ts": int(times[-1]) if len(times) else dst_last,
+    }
+    return len(times)
+
+
+def load_state(dst_dir: str = DST_DIR) -> dict:
+    path = os.path.join(dst_dir, STATE_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state: dict, dst_dir: str = DST_DIR):
+    path = os.path.join(dst_dir, STATE_NAME)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def ingest(src_dir: str = SRC_DIR, dst_dir: str = DST_DIR, store_dir: str = STORE_DIR) -> dict:
+    """Sync every raw CSV into dst_dir (and the store); returns {file: rows written} for changed files."""
+    os.makedirs(dst_dir, exist_ok=True)
+    src = Manifest(src_dir)
+    state = load_state(dst_dir)
+    written = {}
+    try:
+        for fname in sorted(os.listdir(src_dir)):
+            if not fname.endswith('.csv') or '_' not in fname:
+                continue
+            try:
+                n = ingest_file(fname, src, state, dst_dir, store_dir)
+            except Exception as e:
+                print(f"  [!] Could not ingest '{fname}': {e}")
+                continue
+            if n:
+                written[fname] = n
+    finally:
+        save_state(state, dst_dir)
+        src.save(force=True)
+    return written
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+    written = ingest()
+    print(f"✅ Ingested {sum(written.values())} rows into {len(written)} files in '{DST_DIR}'")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,241 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Lagged cross-correlation of every (anchor, target) pair at every lag at
+# once, for AJ/Analysis/lagged_correlation.ipynb.
+#
+# corr[i, j, k] = Pearson correlation of anchor i at time t with target j at
+# time t - lags[k], i.e. data[anchor].corr(data[target].shift(lags[k])),
+# over the rows where both values exist (pairwise NaN masking, like pandas).
+#
+# Per lag, the six sums a correlation needs (count, sum a, sum b, sum a^2,
+# sum b^2, sum ab over the valid overlap) come out of a single matrix
+# product of the stacked [valid, value, value^2] columns of the anchors with
+# the lag-shifted ones of the targets. Columns are standardized first so
+# the sums stay well conditioned, whatever the input (prices or returns).
+
+
+def _stacked(x: np.ndarray):
+    """[valid, value, value^2] side by side, NaN -> 0, each column standardized."""
+    x = np.asarray(x, dtype=float)
+    valid = ~np.isnan(x)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nanmean(x, axis=0)
+        std = np.nanstd(x, axis=0)
+    z = (x - mean) / np.where(std > 0, std, 1.0)
+    z[~valid] = 0.0
+    return np.hstack([valid.astype(float), z, z * z])
+
+
+def _lag_slices(t: int, lag: int):
+    """Rows of the anchor and of the target that line up at a lag (target shifted by lag)."""
+    if lag >= 0:
+        return slice(lag, t), slice(0, t - lag)
+    return slice(0, t + lag), slice(-lag, t)
+
+
+def _corr_from_sums(n, sa, sb, saa, sbb, sab, min_periods: int = 2) -> np.ndarray:
+    """Pearson correlation from count, sums, sums of squares and sum of products."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sab - sa * sb / n
+        var_a = saa - sa * sa / n
+        var_b = sbb - sb * sb / n
+        r = cov / np.sqrt(var_a * var_b)
+    # constant series leave only round-off in the variance
+    r[(n < min_periods) | ~(var_a > 1e-12 * saa) | ~(var_b > 1e-12 * sbb)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def lagged_corr_tensor(anchors: np.ndarray, targets: np.ndarray, max_lag: int,
+                       min_periods: int = 2) -> np.ndarray:
+    """
+    (n_anchors x n_targets x 2*max_lag+1) correlations of the columns of two
+    aligned (T x n) matrices, for lags -max_lag..max_lag. NaN where a pair
+    has fewer than min_periods overlapping rows or no variance.
+    """
+    a, b = _stacked(anchors), _stacked(targets)
+    t, na, nb = a.shape[0], a.shape[1] // 3, b.shape[1] // 3
+    lags = range(-max_lag, max_lag + 1)
+    out = np.full((na, nb, len(lags)), np.nan)
+
+    for k, lag in enumerate(lags):
+        ra, rb = _lag_slices(t, lag)
+        if ra.stop - ra.start < min_periods:
+            continue
+        m = a[ra].T @ b[rb]
+        out[:, :, k] = _corr_from_sums(np.rint(m[:na, :nb]),
+                                       m[na:2 * na, :nb], m[:na, nb:2 * nb],
+                                       m[2 * na:, :nb], m[:na, 2 * nb:],
+                                       m[na:2 * na, nb:2 * nb], min_periods)
+    return out
+
+
+def best_lag(corr: np.ndarray, max_lag: int):
+    """
+    (best_corr, best_lag) over the last axis of a lagged_corr_tensor: the
+    correlation with the largest magnitude (first lag on ties) and its lag;
+    (0, 0) when no lag has a correlation.
+    """
+    mag = np.nan_to_num(np.abs(corr), nan=-1.0)
+    k = mag.argmax(axis=-1)
+    best = np.take_along_axis(corr, k[..., None], axis=-1)[..., 0]
+    found = np.take_along_axis(mag, k[..., None], axis=-1)[..., 0] > 0
+    return np.where(found, best, 0.0), np.where(found, k - max_lag, 0)
+
+
+def lead_lag_matrices(data: pd.DataFrame, anchors: list, targets: list, max_lag: int,
+                      min_periods: int = 2):
+    """
+    Best correlation and best lag of every anchor (rows) against every
+    target (columns) of an aligned DataFrame, as two DataFrames.
+    """
+    corr = lagged_corr_tensor(data[anchors].to_numpy(), data[targets].to_numpy(), max_lag, min_periods)
+    best, lag = best_lag(corr, max_lag)
+    return (pd.DataFrame(best, index=anchors, columns=targets),
+            pd.DataFrame(lag, index=anchors, columns=targets))
+
+
+# ──── Rolling tracker ──────────────────────────────────────────────────────
+#
+# LeadLagTracker keeps the six running sums of every (lag, anchor, target)
+# over the last `window` rows. A pair (anchor[s], target[s - lag]) enters
+# the window when its later row arrives and leaves `window` rows later, so
+# each new row adds one pair per (anchor, target, lag) and removes one:
+# O(pairs x lags) per candle. Values are taken relative to a per-symbol
+# offset, and every `refresh` rows the sums are rebuilt from the row buffer
+# around the window mean, so add/remove round-off and drifting price levels
+# never accumulate.
+
+
+def _column_means(x: np.ndarray) -> np.ndarray:
+    """Mean of the non-NaN values of every column (0 for an all-NaN column)."""
+    count = (~np.isnan(x)).sum(axis=0)
+    return np.nansum(x, axis=0) / np.maximum(count, 1)
+
+
+class LeadLagTracker:
+    """
+    Sliding-window lead-lag correlations, updated one row at a time.
+
+    - update(anchor_row, target_row): push the next aligned row (NaN = missing)
+    - correlations():                 (n_anchors x n_targets x n_lags) window correlations
+    - best():                         (best_corr, best_lag) per pair, see best_lag
+    - save(path) / LeadLagTracker.load(path): checkpoint and resume
+    """
+
+    def __init__(self, anchors: list, targets: list, window: int, max_lag: int,
+                 min_periods: int = None, refresh: int = None):
+        self.anchors, self.targets = list(anchors), list(targets)
+        self.window, self.max_lag = int(window), int(max_lag)
+        self.min_periods = int(min_periods or max(2, window // 2))
+        self.refresh = int(refresh or window)
+        self.lags = np.arange(-self.max_lag, self.max_lag + 1)
+        na, nb, k = len(self.anchors), len(self.targets), len(self.lags)
+
+        self.rows = 0  # rows pushed so far
+        self.since_refresh = 0
+        self.size = self.window + self.max_lag + 1  # oldest row a removal can touch
+        self.buf_a = np.full((self.size, na), np.nan)
+        self.buf_b = np.full((self.size, nb), np.nan)
+        self.off_a = np.zeros(na)
+        self.off_b = np.zeros(nb)
+        self.sums = np.zeros((6, k, na, nb))  # n, sa, sb, saa, sbb, sab
+
+        # for the pairs completed by row u: anchor row u - back_a, target row u - back_b
+        self.back_a = np.maximum(0, -self.lags)
+        self.back_b = np.maximum(0, self.lags)
+
+    def _pairs(self, u: int, sign: int):
+        """Add (sign=1) or remove (sign=-1) the pairs whose later row is u."""
+        ia, ib = u - self.back_a, u - self.back_b
+        a = np.where((ia >= 0)[:, None], self.buf_a[ia % self.size], np.nan) - self.off_a
+        b = np.where((ib >= 0)[:, None], self.buf_b[ib % self.size], np.nan) - self.off_b
+        va, vb = ~np.isnan(a), ~np.isnan(b)
+        a, b = np.where(va, a, 0.0), np.where(vb, b, 0.0)
+        va, vb = va.astype(float), vb.astype(float)
+        op = np.add if sign > 0 else np.subtract
+        terms = ((va, vb), (a, vb), (va, b), (a * a, vb), (va, b * b), (a, b))
+        for s, (x, y) in zip(self.sums, terms):
+            op(s, x[:, :, None] * y[:, None, :], out=s)
+
+    def _rebuild(self):
+        """Recompute the sums of the current window around the buffer's mean."""
+        self.off_a, self.off_b = _column_means(self.buf_a), _column_means(self.buf_b)
+        self.sums[:] = 0.0
+        last = self.rows - 1
+        for u in range(max(0, last - self.window + 1), last + 1):
+            self._pairs(u, 1)
+        self.since_refresh = 0
+
+    def update(self, anchor_row, target_row):
+        u = self.rows
+        self.buf_a[u % self.size] = anchor_row
+        self.buf_b[u % self.size] = target_row
+        self.rows += 1
+        self.since_refresh += 1
+        if self.since_refresh >= self.refresh:
+            self._rebuild()
+            return
+        self._pairs(u, 1)
+        if u - self.window >= 0:
+            self._pairs(u - self.window, -1)
+
+    def correlations(self) -> np.ndarray:
+        n, sa, sb, saa, sbb, sab = self.sums
+        r = _corr_from_sums(np.rint(n), sa, sb, saa, sbb, sab, self.min_periods)
+        return r.transpose(1, 2, 0)
+
+    def best(self):
+        return best_lag(self.correlations(), self.max_lag)
+
+    def save(self, path: str):
+        """Write the tracker state to an .npz checkpoint (atomically)."""
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, anchors=np.array(self.anchors), targets=np.array(self.targets),
+                 config=np.array([self.window, self.max_lag, self.min_periods, self.refresh,
+                                  self.rows, self.since_refresh]),
+                 buf_a=self.buf_a, buf_b=self.buf_b, off_a=self.off_a, off_b=self.off_b,
+                 sums=self.sums)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LeadLagTracker":
+        with np.load(path) as z:
+            window, max_lag, min_periods, refresh, rows, since_refresh = (int(v) for v in z['config'])
+            tracker = cls(z['anchors'].tolist(), z['targets'].tolist(), window, max_lag,
+                          min_periods, refresh)
+            tracker.rows, tracker.since_refresh = rows, since_refresh
+            for name in ("buf_a", "buf_b", "off_a", "off_b", "sums"):
+                setattr(tracker, name, z[name].copy())
+        return tracker
+
+
+def rolling_lead_lag(data: pd.DataFrame, anchors: list, targets: list, window: int, max_lag: int,
+                     every: int = 1, tracker: LeadLagTracker = None, **tracker_kwargs):
+    """
+    Feed the rows of an aligned DataFrame (e.g. load_close_prices, or its
+    returns) through a tracker and record the best lag and correlation of
+    every pair each `every` rows once the window is full.
+
+    Returns (history, tracker): history has one row per (timestamp, anchor,
+    target); pass tracker back in to continue with later rows.
+    """
+    if tracker is None:
+        tracker = LeadLagTracker(anchors, targets, window, max_lag, **tracker_kwargs)
+    a_rows = data[tracker.anchors].to_numpy(dtype=float)
+    b_rows = data[tracker.targets].to_numpy(dtype=float)
+    pairs = pd.MultiIndex.from_product([tracker.anchors, tracker.targets], names=["anchor", "target"])
+
+    frames = []
+    for i, ts in enumerate(data.index):
+        tracker.update(a_rows[i], b_rows[i])
+        if tracker.rows >= tracker.window and tracker.rows % every == 0:
+            corr, lag = tracker.best()
+            frames.append(pd.DataFrame({"timestamp": ts, "corr": corr.ravel(), "lag": lag.ravel()},
+                                       index=pairs))
+    if not frames:
+        return pd.DataFrame(columns=["timestamp", "anchor", "target", "corr", "lag"]), tracker
+    history = pd.concat(frames).reset_index()
+    return history[["timestamp", "anchor", "target", "corr", "lag"]], tracker
@@ -0,0 +1,138 @@
+import numpy as np
+
+from resample import timeframe_ms
+
+# Performance statistics for a batch of equity curves at once.
+#
+# The sweep scripts used to compute every statistic of every grid point with
+# its own np.diff / mean / std / maximum.accumulate pass and a hard-coded
+# sqrt(8760). Here a whole (grid points x candles) equity matrix is reduced
+# row-wise: two work buffers are allocated per batch (none per grid point),
+# the returns are written into one of them, the running peak into the other,
+# and both are reused for the drawdowns. Annualization follows the timeframe
+# (crypto trades around the clock: 8760 periods a year on 1H, 2190 on 4H...).
+#
+# Trade statistics (ragged per grid point) are reduced with np.bincount over
+# the concatenated trades of the batch.
+#
+# perf_scores is the competition score of Nicholas/eval.py (calc_perf_score)
+# over whole columns of a sweep table.
+
+YEAR_MS = 365 * 86_400_000
+
+
+def periods_per_year(timeframe: str) -> float:
+    """'1H' -> 8760.0, '4H' -> 2190.0, '1D' -> 365.0"""
+    return YEAR_MS / timeframe_ms(timeframe)
+
+
+def batch_metrics(equity: np.ndarray, periods: float, holding: np.ndarray = None,
+                  initial=None) -> dict:
+    """
+    Row-wise statistics of a (G x T) equity matrix, as arrays of length G.
+
+    - periods:  periods per year of the candles (see periods_per_year)
+    - holding:  optional (G x T) bool matrix of open positions -> exposure
+    - initial:  starting capital for total_return (default: the first equity value)
+
+    Returns final, total_return (%), mean_return / std_return (per candle,
+    ddof=1), sharpe (annualized, NaN when std is 0), ann_mean / ann_std,
+    max_drawdown (%), peak / trough (equity at the start and the bottom of
+    the max drawdown) and exposure (% of candles in a position, if given).
+    """
+    equity = np.asarray(equity, dtype=float)
+    if equity.ndim == 1:
+        equity = equity[None, :]
+    g, t = equity.shape
+    rows = np.arange(g)
+    if initial is None:
+        initial = equity[:, 0]
+    work = np.empty((g, t))
+    peak = np.empty((g, t))
+
+    # 1) candle returns -> mean, std, Sharpe
+    ret = work[:, :t - 1]
+    np.subtract(equity[:, 1:], equity[:, :-1], out=ret)
+    np.divide(ret, equity[:, :-1], out=ret)
+    mean = ret.mean(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = ret.std(axis=1, ddof=1)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods), np.nan)
+
+    # 2) running peak -> drawdowns (reusing the returns buffer)
+    np.maximum.accumulate(equity, axis=1, out=peak)
+    np.subtract(equity, peak, out=work)
+    np.divide(work, peak, out=work)
+    trough = work.argmin(axis=1)
+
+    out = {
+        "final": equity[:, -1].copy(),
+        "total_return": (equity[:, -1] - initial) / initial * 100,
+        "mean_return": mean,
+        "std_return": std,
+        "sharpe": sharpe,
+        "ann_mean": mean * periods,
+        "ann_std": std * np.sqrt(periods),
+        "max_drawdown": work[rows, trough] * 100,
+        "peak": peak[rows, trough],
+        "trough": equity[rows, trough],
+    }
+    if holding is not None:
+        out["exposure"] = np.asarray(holding).reshape(g, t).mean(axis=1) * 100
+    return out
+
+
+def trade_stats(entry_price: np.ndarray, exit_price: np.ndarray, group: np.ndarray, n_groups: int) -> dict:
+    """
+    Per-group trade count, wins and win rate (%) from the concatenated
+    trades of a batch; group[k] is the row of trade k.
+    """
+    group = np.asarray(group, dtype=np.int64)
+    trades = np.bincount(group, minlength=n_groups)
+    wins = np.bincount(group, weights=np.asarray(exit_price) > np.asarray(entry_price),
+                       minlength=n_groups).astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_rate = np.where(trades > 0, wins / trades * 100, 0.0)
+    return {"trades": trades, "wins": wins, "win_rate": win_rate}
+
+
+# ──── Competition score ────────────────────────────────────────────────────
+
+def perf_scores(inBal, finalBal, mean_return, std_dev_return, high_w, dd):
+    """
+    Column-wise Nicholas/eval.calc_perf_score: every argument may be a scalar or an array
+    (e.g. whole columns of a sweep table). Returns a dict of arrays:
+    returns_score, sharpe_score, dd_score, total_score and passed (all
+    minima met). A zero or NaN std_dev_return gives a Sharpe score of 0;
+    like max(0, ...) in the scalar version, a NaN return or drawdown
+    scores 0 (np.fmax / np.fmin ignore NaN).
+    """
+    inBal, finalBal = np.asarray(inBal, dtype=float), np.asarray(finalBal, dtype=float)
+    mean_return = np.asarray(mean_return, dtype=float)
+    std_dev_return = np.asarray(std_dev_return, dtype=float)
+    high_w, dd = np.asarray(high_w, dtype=float), np.asarray(dd, dtype=float)
+
+    # 1) Returns score
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perc_return = (finalBal - inBal) / inBal * 100
+    returns_score = np.fmin(45, np.fmax(0, perc_return / 300 * 45))
+
+    # 2) “Sharpe” score
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std_dev_return > 0, (mean_return - 0.0443) / std_dev_return, np.nan)
+    sharpe_score = np.nan_to_num(np.clip(sharpe / 5 * 35, 0, 35), nan=0.0)
+
+    # 3) Drawdown score
+    with np.errstate(divide='ignore', invalid='ignore'):
+        draw_down = (high_w - dd) / high_w * 100
+    dd_score  = np.fmax(0, (1 - draw_down / 50) * 20)
+
+    total_score = returns_score + sharpe_score + dd_score
+    passed = (returns_score >= 15) & (sharpe_score >= 10) & (dd_score >= 5) & (total_score >= 60)
+    return {
+        "returns_score": returns_score,
+        "sharpe_score":  sharpe_score,
+        "dd_score":      dd_score,
+        "total_score":   total_score,
+        "passed":        passed,
+    }
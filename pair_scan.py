@@ -0,0 +1,268 @@
+import heapq
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from anchor_store import one_step_returns, shift
+from signal_engine import threshold_masks
+from universe_panel import PANEL_DIR, UniversePanel, open_panel
+
+# All-pairs lead-lag scanner: every symbol of the universe panel as an
+# anchor for every other one, instead of the hard-coded BTC/ETH/SOL.
+#
+# Rule of a (anchor, target, lag, direction, change_pct) candidate, in the
+# terms of the sweeps: BUY the target when the anchor's pct change `lag`
+# candles ago is below (down) / above (up) change_pct, enter at that
+# candle's open (the previous close in the panel) and exit HOLD candles
+# later. Trades are scored independently (overlapping signals are separate
+# trades), so this is a screen, not a backtest: the winners go to
+# sweep_runner.py (see as_buy_rule).
+#
+# For a tile of anchors, the signal masks of every (anchor, lag, threshold)
+# are the columns of one (T x variants) matrix M, and the trade statistics
+# of all variants against a tile of targets come out of a single product
+# M.T @ [valid, fwd, fwd^2, fwd > 0] of the target's forward returns. Tile
+# sizes follow MEMORY_BUDGET; tiles run in a worker pool that maps the
+# panel itself (memory-mapped, nothing is pickled but the tile bounds), and
+# each tile sends back only its best TOP_K anchors per target, merged in
+# the parent into one bounded heap per target.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+TIMEFRAME = "1H"
+RESULTS_FILE = "pair_scan.csv"
+WORKERS = os.cpu_count()      # 1 runs everything in-process
+MEMORY_BUDGET = 512 * 2**20   # bytes of work arrays per tile (per worker)
+ANCHORS = None                # None = every symbol of the panel
+TARGETS = None
+LAGS = [1, 2, 4]              # candles between the anchor move and the BUY
+THRESHOLDS = {                # change_pct values per rule direction
+    "down": np.arange(-10, -1, 1.0),
+    "up": np.arange(2, 11, 1.0),
+}
+HOLD = 4                      # candles a trade is held
+MIN_TRADES = 20               # variants with fewer trades are not ranked
+TOP_K = 10                    # anchors kept per target
+SCORE_KEY = "t-stat"          # any statistic column, larger is better
+
+STATS = ("Trades", "Mean", "Std", "Hit rate", "Excess", "t-stat")
+
+
+def forward_returns(close: np.ndarray, hold: int) -> np.ndarray:
+    """(T x S) return of a trade entered at the open of row t (close[t-1]) and held `hold` rows."""
+    close = np.asarray(close, dtype=float)
+    out = np.full(close.shape, np.nan)
+    if len(close) > hold:
+        out[1:len(close) - hold + 1] = close[hold:] / close[:-hold] - 1
+    return out
+
+
+def variants(lags=LAGS, thresholds=THRESHOLDS) -> list:
+    """(lag, direction, change_pct) of every rule tried per pair, in mask column order."""
+    return [(lag, d, float(cp)) for lag in lags for d, cps in thresholds.items() for cp in cps]
+
+
+def signal_matrix(close: np.ndarray, lags=LAGS, thresholds=THRESHOLDS) -> np.ndarray:
+    """(T x n_anchors*n_variants) 0/1 BUY masks of a block of anchor closes, anchor-major."""
+    close = np.asarray(close, dtype=float)
+    t = len(close)
+    cols = []
+    for j in range(close.shape[1]):
+        ret = one_step_returns(close[:, j])
+        for lag in lags:
+            change = shift(ret, lag)
+            for d, cps in thresholds.items():
+                cols.append(threshold_masks(change, {'direction': d}, cps, "buy"))
+    return np.hstack(cols).astype(float) if cols else np.zeros((t, 0))
+
+
+def tile_sizes(t: int, n_anchors: int, n_targets: int, n_variants: int,
+               budget: int = MEMORY_BUDGET):
+    """
+    (anchor_tile, target_tile) whose work arrays fit in budget bytes.
+    Targets are split only when a single anchor does not fit with all of them.
+    """
+    def size(a, s):
+        av = a * n_variants
+        masks = t * av * (1 + 1 + 8)          # bool columns, their hstack, float64 copy
+        targets = t * s * (8 + 8 + 1 + 8 + 8 + 1 + 32)  # closes, fwd, valid, x, x^2, wins, 4-wide stack
+        stats = av * s * 8 * (4 + 11 + 2)     # sums, stats and their temporaries, scores
+        return masks + targets + stats
+
+    s = max(n_targets, 1)
+    while s > 1 and size(1, s) > budget:
+        s = (s + 1) // 2
+    a = 1
+    while a < n_anchors and size(2 * a, s) <= budget:
+        a *= 2
+    return min(a, max(n_anchors, 1)), s
+
+
+def pair_stats(masks: np.ndarray, fwd: np.ndarray, baseline: np.ndarray) -> dict:
+    """
+    Trade statistics of every mask column (variant) against every target
+    column, as (n_variants x n_targets) arrays; returns in %.
+    """
+    valid = ~np.isnan(fwd)
+    x = np.where(valid, fwd, 0.0)
+    sums = masks.T @ np.hstack([valid, x, x * x, fwd > 0])
+    n, total, squares, wins = np.split(sums, 4, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        std = np.sqrt(np.maximum(squares - n * mean * mean, 0.0) / (n - 1))
+        hit = wins / n
+        t_stat = (mean - baseline) / (std / np.sqrt(n))
+    return {
+        "Trades": n,
+        "Mean": mean * 100,
+        "Std": std * 100,
+        "Hit rate": hit * 100,
+        "Excess": (mean - baseline) * 100,
+        "t-stat": t_stat,
+    }
+
+
+# Worker-side state, filled by _init_worker
+_PANEL = None
+_SPEC = {}
+
+
+def _init_worker(panel_path: str, spec: dict):
+    """Map the panel into this process (read-only memory maps, no copy)."""
+    global _PANEL, _SPEC
+    _PANEL = UniversePanel(panel_path)
+    _SPEC = spec
+
+
+def scan_tile(task):
+    """
+    Score anchor columns [a_lo, a_hi) against target columns [t_lo, t_hi).
+
+    Each pair is represented by its best variant (by score_key, among those
+    with min_trades trades); per target, only the top_k anchors of the tile
+    are returned, as a list of (target, score, anchor position, variant,
+    stats). Equal scores rank the anchor listed first higher.
+    """
+    a_lo, a_hi, t_lo, t_hi = task
+    spec = _SPEC
+    anchors, targets = spec['anchors'][a_lo:a_hi], spec['targets'][t_lo:t_hi]
+    masks = signal_matrix(_PANEL.values('close', anchors), spec['lags'], spec['thresholds'])
+    fwd = forward_returns(_PANEL.values('close', targets), spec['hold'])
+    with np.errstate(invalid='ignore'):
+        baseline = np.nanmean(fwd, axis=0)
+    st = pair_stats(masks, fwd, baseline)
+
+    nv = len(variants(spec['lags'], spec['thresholds']))
+    score = np.where(st['Trades'] >= spec['min_trades'], st[spec['score_key']], np.nan)
+    score = np.nan_to_num(score, nan=-np.inf).reshape(len(anchors), nv, len(targets))
+    best_v = score.argmax(axis=1)                          # (anchors x targets)
+    best = np.take_along_axis(score, best_v[:, None, :], axis=1)[:, 0, :]
+    best[np.array(anchors)[:, None] == np.array(targets)[None, :]] = -np.inf  # no self pairs
+
+    out = []
+    pos = np.arange(a_lo, a_hi)  # anchor positions break ties, as in scan_pairs
+    for j, target in enumerate(targets):
+        for i in np.lexsort((pos, -best[:, j]))[:spec['top_k']]:
+            if best[i, j] == -np.inf:
+                continue
+            row = i * nv + best_v[i, j]
+            out.append((target, float(best[i, j]), int(pos[i]), int(best_v[i, j]),
+                        {s: float(st[s][row, j]) for s in STATS}))
+    return out
+
+
+def scan_pairs(panel: UniversePanel,
+               anchors: list = ANCHORS,
+               targets: list = TARGETS,
+               lags=LAGS,
+               thresholds=THRESHOLDS,
+               hold: int = HOLD,
+               min_trades: int = MIN_TRADES,
+               top_k: int = TOP_K,
+               score_key: str = SCORE_KEY,
+               workers: int = WORKERS,
+               budget: int = MEMORY_BUDGET) -> pd.DataFrame:
+    """
+    Top-k anchors of every target over all ordered pairs of the panel.
+
+    Returns one row per (target, rank) with the anchor, the best rule of
+    the pair (Lag, Direction, Change pct) and its statistics (see
+    pair_stats), sorted by target and rank.
+    """
+    if score_key not in STATS:
+        raise ValueError(f"score_key must be one of {STATS}, got '{score_key}'")
+    spec = {
+        "anchors": list(panel.symbols if anchors is None else anchors),
+        "targets": list(panel.symbols if targets is None else targets),
+        "lags": list(lags),
+        "thresholds": {d: np.asarray(v, dtype=float) for d, v in thresholds.items()},
+        "hold": hold,
+        "min_trades": min_trades,
+        "top_k": top_k,
+        "score_key": score_key,
+    }
+    rules = variants(spec['lags'], spec['thresholds'])
+    na, nt = len(spec['anchors']), len(spec['targets'])
+    a_tile, t_tile = tile_sizes(panel.shape[0], na, nt, len(rules), budget)
+    tasks = [(a, min(a + a_tile, na), t, min(t + t_tile, nt))
+             for t in range(0, nt, t_tile) for a in range(0, na, a_tile)]
+
+    # one bounded min-heap per target: the root is the weakest of its top_k.
+    # Items are keyed (score, -anchor position): on equal scores the anchor
+    # listed later is weaker, the order of the final ranking, so the kept
+    # set does not depend on the order tiles finish in.
+    heaps = {}
+
+    def consume(parts):
+        for part in parts:
+            for target, score, pos, v, stats in part:
+                heap = heaps.setdefault(target, [])
+                item = (score, -pos, v, stats)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+
+    if workers <= 1:
+        _init_worker(panel.path, spec)
+        consume(map(scan_tile, tasks))
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(panel.path, spec)) as pool:
+            consume(pool.imap_unordered(scan_tile, tasks))
+
+    rows = []
+    for target in spec['targets']:
+        ranked = sorted(heaps.get(target, []), reverse=True, key=lambda item: item[:2])
+        for rank, (score, neg_pos, v, stats) in enumerate(ranked, start=1):
+            lag, direction, cp = rules[v]
+            rows.append({"Target": target, "Rank": rank, "Anchor": spec['anchors'][-neg_pos], "Lag": lag,
+                         "Direction": direction, "Change pct": cp, **stats,
+                         "Trades": int(stats['Trades'])})
+    columns = ["Target", "Rank", "Anchor", "Lag", "Direction", "Change pct", *STATS]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def as_buy_rule(row, timeframe: str = TIMEFRAME) -> dict:
+    """BUY rule of a scan row, in the format of sweep_runner.BUY_RULES."""
+    return {"symbol": row['Anchor'], "timeframe": timeframe, "lag": int(row['Lag']),
+            "change_pct": float(row['Change pct']), "direction": row['Direction']}
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+
+    panel = open_panel(TIMEFRAME, panel_dir=PANEL_DIR)
+    scan = scan_pairs(panel)
+    scan.to_csv(RESULTS_FILE, index=False)
+    print(f"✅ {len(scan)} rows ({scan['Target'].nunique()} targets) written to {RESULTS_FILE}")
+
+    leaders = scan[scan['Rank'] == 1].sort_values(SCORE_KEY, ascending=False)
+    print(f"\nStrongest leaders ({HOLD} candle hold, {MIN_TRADES}+ trades):")
+    print(leaders.head(20).to_string(index=False))
+    print(f"\nMost frequent top-{TOP_K} anchors:")
+    print(scan['Anchor'].value_counts().head(10).to_string())
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
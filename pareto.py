@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Pareto front (skyline) of sweep results, instead of chaining one cutoff
+# per metric like Nicholas/filter_results_v3.py: a row is on the front when
+# no other row is at least as good on every objective and better on one.
+#
+# Sort-filter-skyline: rows are first collapsed to their distinct metric
+# vectors (grid points with identical trades share all metrics), then
+# visited in descending order of their summed per-objective ranks. A row
+# can only be dominated by a row visited before it, so every row is
+# compared against the front found so far, block by block with numpy
+# broadcasting, and a row that joins the front never leaves it.
+
+# Objectives and their direction ("max" or "min"); NaN counts as the worst value
+OBJECTIVES = {
+    "Total return": "max",
+    "Sharpe ratio": "max",
+    "Max drawdown": "max",  # drawdowns are negative percentages
+    "Trades": "max",
+}
+BLOCK = 1024
+
+
+def _dominated(front: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """For every point, whether some row of front dominates it (larger is better)."""
+    out = np.zeros(len(points), dtype=bool)
+    for s in range(0, len(front), BLOCK):
+        todo = np.flatnonzero(~out)  # points not yet known to be dominated
+        if len(todo) == 0:
+            break
+        f, p = front[s:s + BLOCK], points[todo]
+        ge = np.ones((len(f), len(p)), dtype=bool)
+        gt = np.zeros((len(f), len(p)), dtype=bool)
+        for j in range(points.shape[1]):
+            ge &= f[:, j, None] >= p[None, :, j]
+            gt |= f[:, j, None] > p[None, :, j]
+        out[todo] = (ge & gt).any(axis=0)
+    return out
+
+
+def pareto_mask(values: np.ndarray, maximize) -> np.ndarray:
+    """
+    Boolean mask of the non-dominated rows of an (n x d) array. maximize
+    holds one bool per column; equal rows are either all on the front or
+    all off it.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return np.zeros(0, dtype=bool)
+
+    # dense ranks per column, larger = better, NaN worst (rank 0)
+    ranks = np.empty(values.shape, dtype=np.int64)
+    for j, up in enumerate(maximize):
+        col = values[:, j] if up else -values[:, j]
+        col = np.where(np.isnan(col), -np.inf, col)
+        ranks[:, j] = np.unique(col, return_inverse=True)[1]
+
+    points, inverse = np.unique(ranks, axis=0, return_inverse=True)
+    order = np.argsort(-points.sum(axis=1), kind="stable")
+    points = points[order]
+
+    front = np.empty((0, points.shape[1]), dtype=points.dtype)
+    on_front = np.zeros(len(points), dtype=bool)
+    for s in range(0, len(points), BLOCK):
+        block = points[s:s + BLOCK]
+        keep = ~_dominated(front, block)
+        # within the block, earlier rows (higher rank sum) may dominate later ones
+        keep[keep] = ~_dominated(block[keep], block[keep])
+        on_front[s:s + BLOCK] = keep
+        front = np.concatenate([front, block[keep]])
+
+    unique_mask = np.empty(len(points), dtype=bool)
+    unique_mask[order] = on_front
+    return unique_mask[inverse.reshape(-1)]
+
+
+def pareto_front(results: pd.DataFrame, objectives: dict = OBJECTIVES,
+                 by: str = None) -> pd.DataFrame:
+    """
+    Rows of results on the Pareto front of `objectives`. With by (e.g.
+    "Symbol"), one front per group. Rows keep their original order.
+    """
+    missing = [c for c in objectives if c not in results.columns]
+    if missing:
+        raise ValueError(f"Missing objective columns: {missing}")
+    for col, direction in objectives.items():
+        if direction not in ("max", "min"):
+            raise ValueError(f"Objective '{col}' must be 'max' or 'min', got '{direction}'")
+
+    maximize = [d == "max" for d in objectives.values()]
+    values = results[list(objectives)].to_numpy(dtype=float)
+    if by is None:
+        return results[pareto_mask(values, maximize)]
+
+    mask = np.zeros(len(results), dtype=bool)
+    for rows in results.groupby(by, sort=False).indices.values():
+        mask[rows] = pareto_mask(values[rows], maximize)
+    return results[mask]
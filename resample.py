@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+
+from candle_store import DATA_DIR, PRICE_COLUMNS, STORE_DIR, list_symbols, load_arrays, write_series
+
+# Derive coarser bars from the finest stored timeframe.
+#
+# Time bars: every candle goes to the UTC bucket floor(ts / width) * width
+# (weeks start on Monday 00:00 UTC like Binance's 1W candles) and each bucket
+# is aggregated as first open, max high, min low, last close, summed volume.
+# From complete 1H data this reproduces the exchange's 4H and 1D candles.
+#
+# Volume / dollar bars: a candle belongs to bar k when the volume (or
+# close * volume) traded before it lies in [k * threshold, (k+1) * threshold),
+# so bar ids come from one cumulative sum and all bars are aggregated in the
+# same vectorized pass as time bars.
+#
+# `python resample.py` derives TARGETS from SOURCE for every stored symbol
+# and writes them into the candle store, so only SOURCE has to be downloaded.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+SOURCE = "1H"
+TARGETS = ["4H", "1D"]
+
+UNIT_MS = {"M": 60_000, "H": 3_600_000, "D": 86_400_000, "W": 604_800_000}
+WEEK_OFFSET_MS = 4 * 86_400_000  # 1970-01-01 was a Thursday; Binance weeks start on Monday
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """'15M' -> 900000, '4H' -> 14400000, '1D' -> 86400000 (M = minutes; months are not supported)."""
+    tf = timeframe.upper()
+    return int(tf[:-1]) * UNIT_MS[tf[-1]]
+
+
+def aggregate(cols: dict, starts: np.ndarray) -> dict:
+    """OHLCV of the runs of candles that begin at the indices in `starts` (sorted, starts[0] == 0)."""
+    ends = np.append(starts[1:], len(cols['timestamp'])) - 1
+    return {
+        'timestamp': np.asarray(cols['timestamp'])[starts],
+        'open': np.asarray(cols['open'])[starts],
+        'high': np.maximum.reduceat(np.asarray(cols['high']), starts),
+        'low': np.minimum.reduceat(np.asarray(cols['low']), starts),
+        'close': np.asarray(cols['close'])[ends],
+        'volume': np.add.reduceat(np.asarray(cols['volume']), starts),
+    }
+
+
+def _run_starts(ids: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1))
+
+
+def resample(cols: dict, target: str, source: str = None, drop_partial: bool = True) -> dict:
+    """
+    Time bars of width `target` from finer candles (column dict as returned by
+    candle_store.load_arrays). Bars are stamped with their bucket open time.
+    With drop_partial, edge buckets missing source candles are dropped: a
+    first bucket whose data starts after the bucket open and a last bucket
+    that has not reached its final source candle yet (still forming); pass
+    `source` for the latter check.
+    """
+    ts = np.asarray(cols['timestamp'], dtype=np.int64)
+    if len(ts) == 0:
+        return {c: np.asarray(cols[c])[:0] for c in ('timestamp',) + PRICE_COLUMNS}
+    width = timeframe_ms(target)
+    offset = WEEK_OFFSET_MS if target.upper().endswith("W") else 0
+    bucket = (ts - offset) // width * width + offset
+
+    starts = _run_starts(bucket)
+    out = aggregate(cols, starts)
+    out['timestamp'] = bucket[starts]
+
+    if drop_partial:
+        lo = 1 if ts[0] > bucket[0] else 0
+        hi = len(starts)
+        if source is not None and ts[-1] + timeframe_ms(source) < bucket[-1] + width:
+            hi -= 1
+        out = {c: a[lo:max(lo, hi)] for c, a in out.items()}
+    return out
+
+
+def activity_bars(cols: dict, threshold: float, weights: np.ndarray, drop_partial: bool = True) -> dict:
+    """Bars that each hold about `threshold` of `weights` (volume, dollar volume...)."""
+    w = np.nan_to_num(np.asarray(weights, dtype=np.float64))
+    if len(w) == 0:
+        return {c: np.asarray(cols[c])[:0] for c in ('timestamp',) + PRICE_COLUMNS}
+    before = np.cumsum(w) - w
+    ids = np.floor(before / threshold).astype(np.int64)
+    starts = _run_starts(ids)
+    out = aggregate(cols, starts)
+    out['end_timestamp'] = np.asarray(cols['timestamp'])[np.append(starts[1:], len(w)) - 1]
+
+    # the last bar is complete only once its cumulative weight crosses the next multiple
+    if drop_partial and before[-1] + w[-1] < (ids[-1] + 1) * threshold:
+        out = {c: a[:-1] for c, a in out.items()}
+    return out
+
+
+def volume_bars(cols: dict, threshold: float, drop_partial: bool = True) -> dict:
+    return activity_bars(cols, threshold, cols['volume'], drop_partial)
+
+
+def dollar_bars(cols: dict, threshold: float, drop_partial: bool = True) -> dict:
+    return activity_bars(cols, threshold, np.asarray(cols['close']) * np.asarray(cols['volume']),
+                         drop_partial)
+
+
+def derive_timeframes(symbol: str, source: str = SOURCE, targets: list = TARGETS,
+                      store_dir: str = STORE_DIR, data_dir: str = DATA_DIR) -> dict:
+    """Resample one symbol's source series into every target timeframe and store them."""
+    cols = load_arrays(symbol, source, store_dir=store_dir, data_dir=data_dir)
+    counts = {}
+    for tf in targets:
+        bars = resample(cols, tf, source)
+        write_series(symbol, tf, bars, store_dir)
+        counts[tf] = len(bars['timestamp'])
+    return counts
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+    symbols = list_symbols(SOURCE, STORE_DIR, DATA_DIR)
+    for sym in symbols:
+        derive_timeframes(sym)
+    print(f"✅ Derived {', '.join(TARGETS)} from {SOURCE} for {len(symbols)} symbols into '{STORE_DIR}'")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
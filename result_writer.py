@@ -0,0 +1,180 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Append-only columnar file for sweep results.
+#
+# A results directory holds:
+#   schema.json  column names and numpy dtypes (fixed on the first batch),
+#                plus the `meta` dict of the run that created it
+#
+# Numeric columns are stored as float64 whatever the first batch held (an
+# int column may later see NaN or floats), bool columns as bytes and string
+# columns as fixed-width bytes: declare their widths up front (str_widths,
+# e.g. the longest symbol of the universe), otherwise they are sized from the
+# first batch, at least STR_WIDTH bytes.
+#   c<k>.bin     raw values of column k, appended batch after batch
+#   commit.log   one "<total rows>\t<task key>" line per completed task
+#
+# Rows are buffered and flushed in batches. A task only counts as done once
+# its rows are on disk and its commit line is written, so after a crash the
+# column files are truncated back to the last committed row count and the
+# uncommitted tasks are simply run again.
+
+BATCH_ROWS = 5_000
+STR_WIDTH = 32  # minimum bytes per value of an undeclared string column
+
+
+def _scan_commits(path: str):
+    """(rows, keys, size) of the complete lines of a commit log; a torn last line is ignored."""
+    rows, done, size = 0, set(), 0
+    log = os.path.join(path, "commit.log")
+    if os.path.exists(log):
+        with open(log, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                n, key = line.decode().rstrip("\n").split("\t", 1)
+                rows = int(n)
+                done.add(key)
+                size += len(line)
+    return rows, done, size
+
+
+def read_commits(path: str):
+    """(committed row count, committed task keys) of a results directory."""
+    rows, done, _ = _scan_commits(path)
+    return rows, done
+
+
+def _dtype_of(values: list, width: int = None) -> str:
+    """Column dtype for the values of the first batch; width is a declared string width."""
+    if all(isinstance(v, (bool, np.bool_)) for v in values):
+        return "|b1"
+    if all(isinstance(v, (int, float, np.integer, np.floating)) or v is None for v in values):
+        return "<f8"
+    longest = max(len(str(v).encode()) for v in values)
+    return f"|S{max(width or STR_WIDTH, longest)}"
+
+
+class ResultWriter:
+    """
+    Streaming writer for one results directory.
+
+    - done:            task keys already committed (skip them on a rerun)
+    - add(key, rows):  buffer the rows of one finished task
+    - flush():         write buffered rows, then commit their tasks
+
+    str_widths maps string columns to their width in bytes (e.g. {"Symbol":
+    longest symbol}); a directory whose columns are narrower is refused.
+    """
+
+    def __init__(self, path: str, meta: dict = None, batch_rows: int = BATCH_ROWS,
+                 str_widths: dict = None):
+        self.path = path
+        self.meta = meta or {}
+        self.batch_rows = batch_rows
+        self.str_widths = str_widths or {}
+        self.columns = None
+        self.rows = 0
+        self.done = set()
+        self._buffer = []
+        self._pending = []
+        os.makedirs(path, exist_ok=True)
+
+        schema_path = os.path.join(path, "schema.json")
+        if os.path.exists(schema_path):
+            with open(schema_path) as f:
+                schema = json.load(f)
+            if schema['meta'] != self.meta:
+                raise ValueError(f"{path} was written by a different sweep configuration; "
+                                 f"use a new results path or delete it")
+            self.columns = [(c['name'], np.dtype(c['dtype'])) for c in schema['columns']]
+            narrow = [n for n, d in self.columns if d.kind == "S" and d.itemsize < self.str_widths.get(n, 0)]
+            if narrow:
+                raise ValueError(f"{path} stores {narrow} narrower than {self.str_widths}; "
+                                 f"use a new results path or delete it")
+        self.rows, self.done, log_size = _scan_commits(path)
+        self._truncate(log_size)
+
+    def _col_file(self, k: int) -> str:
+        return os.path.join(self.path, f"c{k}.bin")
+
+    def _truncate(self, log_size: int):
+        """Drop a torn commit line and any rows written after the last commit (interrupted flush)."""
+        log = os.path.join(self.path, "commit.log")
+        if os.path.exists(log) and os.path.getsize(log) > log_size:
+            os.truncate(log, log_size)
+        for k, (_, dtype) in enumerate(self.columns or []):
+            p = self._col_file(k)
+            if os.path.exists(p) and os.path.getsize(p) > self.rows * dtype.itemsize:
+                os.truncate(p, self.rows * dtype.itemsize)
+
+    def _init_schema(self, rows: list):
+        self.columns = [(name, np.dtype(_dtype_of([r[name] for r in rows], self.str_widths.get(name))))
+                        for name in rows[0]]
+        schema = {"columns": [{"name": n, "dtype": d.str} for n, d in self.columns], "meta": self.meta}
+        tmp = os.path.join(self.path, "schema.json.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(schema, f)
+        os.replace(tmp, os.path.join(self.path, "schema.json"))
+
+    def add(self, key: str, rows: list):
+        self._buffer.extend(rows)
+        self._pending.append((key, len(rows)))
+        if len(self._buffer) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        if self._buffer and self.columns is None:
+            self._init_schema(self._buffer)
+        if self._buffer:
+            for k, (name, dtype) in enumerate(self.columns):
+                values = [r[name] for r in self._buffer]
+                if dtype.kind == "S":
+                    values = [str(v).encode() for v in values]
+                    if max(len(v) for v in values) > dtype.itemsize:
+                        raise ValueError(f"Column '{name}' value longer than {dtype.itemsize} bytes")
+                with open(self._col_file(k), 'ab') as f:
+                    f.write(np.asarray(values, dtype=dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        lines = []
+        for key, n in self._pending:
+            self.rows += n
+            lines.append(f"{self.rows}\t{key}\n")
+            self.done.add(key)
+        with open(os.path.join(self.path, "commit.log"), 'a') as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer, self._pending = [], []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_results(path: str) -> pd.DataFrame:
+    """All committed rows of a results directory as a DataFrame (strings decoded)."""
+    if not os.path.exists(os.path.join(path, "schema.json")):
+        return pd.DataFrame()
+    with open(os.path.join(path, "schema.json")) as f:
+        schema = json.load(f)
+    rows, _ = read_commits(path)
+    data = {}
+    for k, c in enumerate(schema['columns']):
+        dtype = np.dtype(c['dtype'])
+        values = np.fromfile(os.path.join(path, f"c{k}.bin"), dtype=dtype, count=rows)
+        data[c['name']] = values.astype(str) if dtype.kind == "S" else values
+    return pd.DataFrame(data)
@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+from pareto import OBJECTIVES, pareto_front
+from result_writer import read_commits, read_results
+
+# Indexed SQLite store for sweep results, replacing the per-question pandas
+# scripts in Nicholas/filter_results*.py.
+#
+# Every results CSV (or result_writer directory) is loaded once into the
+# `results` table, tagged with its `source` name; the `sources` table keeps
+# each source's path and size/mtime so an unchanged file is never reread. A
+# source name belongs to one path: loading another file under a name already
+# taken (e.g. two results.csv of different runs) is refused unless it is
+# renamed (--source) or meant to replace the old one (--replace). Columns are
+# added as new sources bring them (Entry_cp/Exit_cp, BTC_cp/ETH_cp, ...) and
+# indexed per (source, column) for Symbol and the metric columns.
+#
+# CLI:
+#   python results_db.py load results_comparison.csv Nicholas/*.csv
+#   python results_db.py query --source results_comparison_SOL_SL.csv \
+#       --where "Final cash>14000" --where "Sharpe ratio>2" --top 3 --by "Total return"
+#   python results_db.py query --where "Entry_cp>0" --group-by Symbol --agg count --agg "mean:Final cash"
+#   python results_db.py pareto --source results_comparison_SOL_SL.csv --where "Entry_cp>0" --per-symbol
+#   python results_db.py sources
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+DB_FILE = "results.sqlite"
+CHUNK_ROWS = 50_000
+INDEXED = ["Symbol", "Final cash", "Total return", "Trades", "Win rate", "Sharpe ratio", "Max drawdown",
+           "Perf score"]
+
+
+# ========== STORE ==========
+
+OPS = (">=", "<=", "!=", ">", "<", "=")
+AGGS = {"count": "COUNT", "mean": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM"}
+
+
+def _q(name: str) -> str:
+    """Quoted SQL identifier (column names contain spaces)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def connect(path: str = DB_FILE) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS results (source TEXT NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS sources "
+                 "(source TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime REAL, rows INTEGER, columns TEXT)")
+    return conn
+
+
+def columns(conn: sqlite3.Connection) -> list:
+    return [r[1] for r in conn.execute("PRAGMA table_info(results)")]
+
+
+def _ensure_columns(conn: sqlite3.Connection, df: pd.DataFrame):
+    have = set(columns(conn))
+    for name, dtype in df.dtypes.items():
+        if name not in have:
+            conn.execute(f"ALTER TABLE results ADD COLUMN {_q(name)} {_sql_type(dtype)}")
+
+
+def _index(conn: sqlite3.Connection):
+    for name in INDEXED:
+        if name in columns(conn):
+            idx = _q("ix_" + re.sub(r"\W", "_", name))
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {idx} ON results (source, {_q(name)})")
+
+
+def _insert(conn: sqlite3.Connection, source: str, df: pd.DataFrame) -> int:
+    _ensure_columns(conn, df)
+    names = ["source"] + list(df.columns)
+    sql = (f"INSERT INTO results ({', '.join(_q(c) for c in names)}) "
+           f"VALUES ({', '.join('?' * len(names))})")
+    values = df.astype(object).where(df.notna(), None)
+    conn.executemany(sql, ((source, *row) for row in values.itertuples(index=False, name=None)))
+    return len(df)
+
+
+def _signature(path: str):
+    """(size, mtime) of a CSV, or (committed rows, mtime of commit.log) of a result_writer directory."""
+    if os.path.isdir(path):
+        log = os.path.join(path, "commit.log")
+        return read_commits(path)[0], os.path.getmtime(log) if os.path.exists(log) else 0.0
+    st = os.stat(path)
+    return st.st_size, st.st_mtime
+
+
+def load(conn: sqlite3.Connection, path: str, source: str = None, chunk_rows: int = CHUNK_ROWS,
+         replace: bool = False):
+    """
+    Load one results CSV or result_writer directory as `source` (default:
+    its file name). Returns the number of rows loaded, or None when the
+    source is already loaded and unchanged. Raises ValueError when the
+    source name was loaded from another path, unless replace is set.
+    """
+    source = source or os.path.basename(os.path.normpath(path))
+    size, mtime = _signature(path)
+    old = conn.execute("SELECT path, size, mtime FROM sources WHERE source = ?", (source,)).fetchone()
+    if old is not None and old[0] != os.path.abspath(path):
+        if not replace:
+            raise ValueError(f"Source '{source}' was loaded from {old[0]}; "
+                             f"load {path} under another source name or replace it")
+    elif old is not None and old[1:] == (size, mtime):
+        return None
+
+    with conn:
+        conn.execute("DELETE FROM results WHERE source = ?", (source,))
+        chunks = [read_results(path)] if os.path.isdir(path) else pd.read_csv(path, chunksize=chunk_rows)
+        rows, names = 0, []
+        for chunk in chunks:
+            rows += _insert(conn, source, chunk)
+            names = list(chunk.columns)
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                     (source, os.path.abspath(path), size, mtime, rows, json.dumps(names)))
+        _index(conn)
+    conn.execute("ANALYZE")
+    return rows
+
+
+def parse_filter(text: str):
+    """'Final cash>12000' -> ('Final cash', '>', 12000.0)."""
+    for op in OPS:
+        col, sep, value = text.partition(op)
+        if sep:
+            value = value.strip()
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+            return col.strip(), op, value
+    raise ValueError(f"Filter '{text}' has no comparison operator ({', '.join(OPS)})")
+
+
+def parse_agg(text: str):
+    """'count' -> ('count', None); 'mean:Final cash' -> ('mean', 'Final cash')."""
+    func, _, col = text.partition(":")
+    if func not in AGGS:
+        raise ValueError(f"Unknown aggregate '{func}', expected one of {list(AGGS)}")
+    if func != "count" and not col:
+        raise ValueError(f"Aggregate '{func}' needs a column, e.g. '{func}:Final cash'")
+    return func, col or None
+
+
+def query(conn: sqlite3.Connection,
+          source: str = None,
+          where: list = (),
+          top: int = None,
+          by: str = None,
+          ascending: bool = False,
+          group_by: list = (),
+          aggs: list = (),
+          limit: int = None) -> pd.DataFrame:
+    """
+    Filter the results table and return a DataFrame.
+
+    - where:    (column, op, value) filters, AND-ed (see parse_filter)
+    - top, by:  keep the `top` best rows per Symbol ranked by column `by`
+    - group_by: group on these columns and compute aggs ((func, column) pairs,
+                see parse_agg; COUNT(*) when none are given)
+    """
+    known = set(columns(conn))
+    for col in [c for c, _, _ in where] + list(group_by) + [c for _, c in aggs if c] + [by] * bool(by):
+        if col not in known:
+            raise ValueError(f"Unknown column '{col}'")
+
+    conds, params = [], []
+    if source is not None:
+        conds.append("source = ?")
+        params.append(source)
+    for col, op, value in where:
+        conds.append(f"{_q(col)} {op} ?")
+        params.append(value)
+    cols = "*"
+    if source is not None:
+        # only the columns this source was loaded with
+        row = conn.execute("SELECT columns FROM sources WHERE source = ?", (source,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown source '{source}'")
+        cols = ", ".join(_q(c) for c in json.loads(row[0])) or "*"
+    where_sql = f" WHERE {' AND '.join(conds)}" if conds else ""
+    order = "ASC" if ascending else "DESC"
+
+    if group_by:
+        keys = ", ".join(_q(c) for c in group_by)
+        selects = [f"COUNT(*) AS count" if col is None else
+                   f"{AGGS[func]}({_q(col)}) AS {_q(f'{func} {col}')}"
+                   for func, col in (aggs or [("count", None)])]
+        sql = f"SELECT {keys}, {', '.join(selects)} FROM results{where_sql} GROUP BY {keys} ORDER BY {keys}"
+    elif top is not None:
+        if by is None:
+            raise ValueError("top needs a column to rank by")
+        sql = (f"SELECT {cols}, rank FROM (SELECT *, ROW_NUMBER() OVER "
+               f"(PARTITION BY source, Symbol ORDER BY {_q(by)} {order}) AS rank "
+               f"FROM results{where_sql}) WHERE rank <= ? ORDER BY source, Symbol, rank")
+        params.append(int(top))
+    elif by is not None:
+        sql = f"SELECT {cols} FROM results{where_sql} ORDER BY {_q(by)} {order}"
+    else:
+        sql = f"SELECT {cols} FROM results{where_sql} ORDER BY rowid"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def count(conn: sqlite3.Connection, source: str = None, where: list = ()) -> int:
+    """Number of rows passing the where filters."""
+    df = query(conn, source, where, group_by=["source"])
+    return int(df['count'].sum())
+
+
+def sources(conn: sqlite3.Connection) -> pd.DataFrame:
+    return pd.read_sql_query("SELECT source, rows, path FROM sources ORDER BY source", conn)
+
+
+# ──── CLI ──────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load sweep results into SQLite and query them.")
+    parser.add_argument("--db", default=DB_FILE, help=f"database file (default {DB_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_load = sub.add_parser("load", help="load results CSVs or result_writer directories")
+    p_load.add_argument("paths", nargs="+")
+    p_load.add_argument("--source", help="source name (single path only; default: file name)")
+    p_load.add_argument("--replace", action="store_true",
+                        help="replace a source of the same name loaded from another path")
+
+    p_query = sub.add_parser("query", help="filter, rank and group loaded results")
+    p_query.add_argument("--source", help="only this source")
+    p_query.add_argument("--where", action="append", default=[], metavar="'COL>VALUE'",
+                         help="threshold filter, repeatable (ops: >= <= != > < =)")
+    p_query.add_argument("--top", type=int, help="best N rows per symbol (needs --by)")
+    p_query.add_argument("--by", help="column to rank / sort by (descending)")
+    p_query.add_argument("--asc", action="store_true", help="rank ascending instead")
+    p_query.add_argument("--group-by", action="append", default=[], metavar="COL")
+    p_query.add_argument("--agg", action="append", default=[], metavar="FUNC[:COL]",
+                         help="count, mean:COL, min:COL, max:COL, sum:COL (with --group-by)")
+    p_query.add_argument("--limit", type=int)
+    p_query.add_argument("--out", help="write the result to this CSV instead of printing it")
+
+    p_pareto = sub.add_parser("pareto", help="Pareto front of the filtered results (see pareto.py)")
+    p_pareto.add_argument("--source", help="only this source")
+    p_pareto.add_argument("--where", action="append", default=[], metavar="'COL>VALUE'")
+    p_pareto.add_argument("--objective", action="append", default=[], metavar="COL[:min]",
+                          help=f"repeatable, maximized unless ':min' (default: {', '.join(OBJECTIVES)})")
+    p_pareto.add_argument("--per-symbol", action="store_true", help="one front per symbol")
+    p_pareto.add_argument("--out", help="write the front to this CSV instead of printing it")
+
+    sub.add_parser("sources", help="list loaded sources")
+
+    args = parser.parse_args(argv)
+    start_time = time.time()
+    conn = connect(args.db)
+    try:
+        if args.command == "load":
+            if args.source and len(args.paths) > 1:
+                parser.error("--source needs a single path")
+            for path in args.paths:
+                try:
+                    rows = load(conn, path, args.source, replace=args.replace)
+                except ValueError as e:
+                    parser.error(str(e))
+                status = "unchanged, skipped" if rows is None else f"{rows} rows loaded"
+                print(f"✅ {path}: {status}")
+        elif args.command == "sources":
+            print(sources(conn).to_string(index=False))
+        else:
+            try:
+                where = [parse_filter(w) for w in args.where]
+                if args.command == "pareto":
+                    objectives = OBJECTIVES
+                    if args.objective:
+                        objectives = {col: d or "max" for col, _, d in
+                                      (o.partition(":") for o in args.objective)}
+                    df = pareto_front(query(conn, args.source, where), objectives,
+                                      by="Symbol" if args.per_symbol else None)
+                else:
+                    df = query(conn, args.source, where, args.top, args.by, args.asc,
+                               args.group_by, [parse_agg(a) for a in args.agg], args.limit)
+            except ValueError as e:
+                parser.error(str(e))
+            if args.out:
+                df.to_csv(args.out, index=False)
+                print(f"✅ {len(df)} rows written to {args.out}")
+            else:
+                with pd.option_context("display.max_rows", None, "display.width", None):
+                    print(df.to_string(index=False))
+    finally:
+        conn.close()
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+
+# Search strategies over a discrete parameter space, used by sweep_runner.py
+# instead of always walking the full np.arange grid.
+#
+# space:    {axis: candidate values}, e.g. {"BTC": np.arange(-4.5, 15.5, 1), ...}
+# evaluate: evaluate(values, fraction) -> metrics dict, where values maps
+#           every axis to one candidate and fraction is the share of the
+#           history to backtest on (the most recent candles; 1.0 = all)
+#
+# The budget is counted in full-history evaluations: a backtest on a quarter
+# of the history costs 0.25. Points are never evaluated twice at the same
+# fidelity. Every strategy draws from np.random.default_rng(seed) only, so a
+# search is reproducible given its seed.
+#
+# Strategies:
+#   exhaustive          every point in itertools.product order (up to the budget)
+#   random              points sampled without replacement
+#   coarse_to_fine      strided sub-grid, then finer grids around the best points
+#   successive_halving  many random points on a short history, the best half
+#                       (1/eta) promoted to a history eta times longer each round
+
+
+class _Search:
+    """Evaluation cache, budget accounting and the evaluation log of one search."""
+
+    def __init__(self, space: dict, evaluate, budget: float, score_key: str):
+        self.axes = list(space)
+        self.values = [np.asarray(space[a]) for a in self.axes]
+        self.shape = tuple(len(v) for v in self.values)
+        self.size = math.prod(self.shape)
+        self._evaluate = evaluate
+        self.budget = float(self.size if budget is None else budget)
+        self.score_key = score_key
+        self.cost = 0.0
+        self.scores = {}
+        self.records = []
+
+    def affordable(self, fraction: float = 1.0) -> bool:
+        return self.cost + fraction <= self.budget + 1e-9
+
+    def score(self, point: tuple, fraction: float = 1.0):
+        """Score of a point (tuple of indices) at one fidelity, or None when over budget."""
+        key = (point, fraction)
+        if key in self.scores:
+            return self.scores[key]
+        if not self.affordable(fraction):
+            return None
+        self.cost += fraction
+        values = {a: v[i] for a, v, i in zip(self.axes, self.values, point)}
+        metrics = self._evaluate(values, fraction)
+        s = metrics.get(self.score_key, np.nan)
+        s = -np.inf if s is None or np.isnan(s) else float(s)
+        self.scores[key] = s
+        self.records.append({**{f"{a}_cp": values[a] for a in self.axes},
+                             "Fidelity": fraction, **metrics, "Score": s})
+        return s
+
+    def unravel(self, flat) -> tuple:
+        return tuple(int(i) for i in np.unravel_index(flat, self.shape))
+
+
+def _ranked(points: list, scores: list) -> list:
+    """Points sorted by score, best first (ties keep their order)."""
+    order = sorted(range(len(points)), key=lambda k: -scores[k])
+    return [points[k] for k in order]
+
+
+# ──── Strategies ───────────────────────────────────────────────────────────
+
+def exhaustive(search: _Search, rng):
+    for point in itertools.product(*(range(n) for n in search.shape)):
+        if search.score(point) is None:
+            return
+
+
+def random_search(search: _Search, rng):
+    for flat in rng.permutation(search.size):
+        if search.score(search.unravel(flat)) is None:
+            return
+
+
+def coarse_to_fine(search: _Search, rng, stride: int = None, top_k: int = 3):
+    """
+    Evaluate every stride-th value per axis, then repeatedly halve the stride
+    and evaluate the neighbourhoods (+-stride) of the top_k points so far,
+    until the stride-1 neighbourhoods of the best points are all known.
+    """
+    if stride is None:
+        stride = max(1, max(search.shape) // 4)
+    # a random offset per axis keeps different seeds from sharing the same coarse grid
+    offsets = [int(rng.integers(0, min(stride, n))) for n in search.shape]
+    points = list(itertools.product(*(range(o, n, stride) for o, n in zip(offsets, search.shape))))
+    while True:
+        for q in points:
+            if search.score(q) is None:
+                return
+        full = [(p, s) for (p, f), s in search.scores.items() if f == 1.0]
+        best = _ranked([p for p, _ in full], [s for _, s in full])[:top_k]
+        stride = max(1, stride // 2)
+        # neighbours on the point's own lattice, clipped one by one at the grid edges
+        around = (itertools.product(*([v for v in (i - stride, i, i + stride) if 0 <= v < n]
+                                      for i, n in zip(p, search.shape)))
+                  for p in best)
+        points = [q for q in dict.fromkeys(itertools.chain.from_iterable(around))
+                  if (q, 1.0) not in search.scores]
+        if not points and stride == 1:
+            return
+
+
+def successive_halving(search: _Search, rng, eta: int = 2, min_fraction: float = 0.25):
+    """
+    Rungs at fractions min_fraction * eta**r up to the full history. Every
+    rung costs about the same, so the first rung gets
+    budget / (min_fraction * n_rungs) random candidates.
+    """
+    fractions = []
+    f = min_fraction
+    while f < 1.0:
+        fractions.append(f)
+        f *= eta
+    fractions.append(1.0)
+    n0 = int(search.budget // (min_fraction * len(fractions)))
+    n0 = max(1, min(search.size, n0))
+    candidates = [search.unravel(flat) for flat in rng.permutation(search.size)[:n0]]
+
+    for fraction in fractions:
+        scored = []
+        for p in candidates:
+            s = search.score(p, fraction)
+            if s is None:
+                break
+            scored.append((p, s))
+        if not scored or fraction == 1.0:
+            return
+        keep = max(1, len(scored) // eta)
+        candidates = _ranked([p for p, _ in scored], [s for _, s in scored])[:keep]
+
+
+STRATEGIES = {
+    "exhaustive": exhaustive,
+    "random": random_search,
+    "coarse_to_fine": coarse_to_fine,
+    "successive_halving": successive_halving,
+}
+
+
+def run_search(space: dict, evaluate, strategy: str = "exhaustive", budget: float = None,
+               seed: int = 0, score_key: str = "Total return", **options) -> pd.DataFrame:
+    """
+    Run one search and return its evaluation log (one row per backtest,
+    in evaluation order). Rows with Fidelity 1.0 are full-history results.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}', expected one of {list(STRATEGIES)}")
+    search = _Search(space, evaluate, budget, score_key)
+    STRATEGIES[strategy](search, np.random.default_rng(seed), **options)
+    log = pd.DataFrame(search.records)
+    log.attrs["cost"] = search.cost
+    return log
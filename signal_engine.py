@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# Mask-based rule engine shared by the sweep scripts.
+#
+# Every rule is evaluated once over the whole series as a boolean array:
+# BUY rules are AND-ed, SELL rules are OR-ed and BUY wins over SELL, exactly
+# like the per-row loop in strategy_base.generate_signals. For parameter
+# sweeps, grid_signal_codes evaluates each rule for all of its thresholds at
+# once and combines the rules by broadcasting over the grid axes.
+
+# Signal codes used by the array kernels (int8)
+HOLD, BUY, SELL = 0, 1, -1
+
+# Lookup table: LABELS[code + 1] -> "SELL" / "HOLD" / "BUY"
+LABELS = np.array(["SELL", "HOLD", "BUY"], dtype=object)
+
+
+def rule_mask(change: np.ndarray, rule: dict, side: str) -> np.ndarray:
+    """
+    Boolean mask of the candles on which a single rule fires.
+
+    - change: shifted pct-change array for the rule's (symbol, timeframe, lag)
+    - side:   "buy" (strict comparison, NaN fails) or "sell" (inclusive comparison)
+    """
+    change = np.asarray(change, dtype=float)
+    thresh = rule['change_pct'] / 100
+
+    if side == "buy":
+        # a BUY rule only fails on NaN or when the move is not strong enough
+        if rule['direction'] == "up":
+            return change > thresh
+        if rule['direction'] == "down":
+            return change < thresh
+        return ~np.isnan(change)
+
+    if rule['direction'] == "down":
+        return change <= thresh
+    if rule['direction'] == "up":
+        return change >= thresh
+    return np.zeros(len(change), dtype=bool)
+
+
+def combine_masks(buy_masks: list, sell_masks: list, n: int) -> np.ndarray:
+    """AND the BUY masks, OR the SELL masks and apply BUY-over-SELL precedence."""
+    buy = np.ones(n, dtype=bool)
+    for m in buy_masks:
+        buy &= m
+    sell = np.zeros(n, dtype=bool)
+    for m in sell_masks:
+        sell |= m
+    return np.where(buy, BUY, np.where(sell, SELL, HOLD)).astype(np.int8)
+
+
+def signal_codes(buy_rules: list, sell_rules: list, pct_dict: dict, n: int) -> np.ndarray:
+    """int8 signal codes from precomputed pct changes keyed by (symbol, timeframe, lag)."""
+    buy_masks = [rule_mask(pct_dict[(r['symbol'], r['timeframe'], r['lag'])], r, "buy")
+                 for r in buy_rules]
+    sell_masks = [rule_mask(pct_dict[(r['symbol'], r['timeframe'], r['lag'])], r, "sell")
+                  for r in sell_rules]
+    return combine_masks(buy_masks, sell_masks, n)
+
+
+def threshold_masks(change: np.ndarray, rule: dict, thresholds, side: str) -> np.ndarray:
+    """
+    (n_rows x n_thresholds) masks of one rule for every change_pct in
+    thresholds; column k equals rule_mask(change, {**rule, 'change_pct': thresholds[k]}, side).
+    """
+    change = np.asarray(change, dtype=float)[:, None]
+    thresh = np.asarray(thresholds, dtype=float)[None, :] / 100
+
+    if side == "buy":
+        if rule['direction'] == "up":
+            return change > thresh
+        if rule['direction'] == "down":
+            return change < thresh
+        return np.broadcast_to(~np.isnan(change), (change.shape[0], thresh.shape[1]))
+
+    if rule['direction'] == "down":
+        return change <= thresh
+    if rule['direction'] == "up":
+        return change >= thresh
+    return np.zeros((change.shape[0], thresh.shape[1]), dtype=bool)
+
+
+def grid_signal_codes(buy_rules: list, sell_rules: list, pct_dict: dict, n: int,
+                      grid: dict, axis_key=lambda r: r['symbol'], points=None) -> np.ndarray:
+    """
+    int8 signal codes for every point of a change_pct grid at once.
+
+    grid maps an axis name to its change_pct values; a BUY rule is swept on
+    the axis axis_key(rule) when that axis is in grid (by default the rule's
+    symbol) and keeps its own change_pct otherwise. Each rule contributes one
+    (n x len(axis)) mask matrix, and the matrices are AND-ed with
+    broadcasting over the grid axes. The result has shape
+    (n, len(axis_1), ..., len(axis_k)), in grid order, so reshape(n, -1)
+    lists the points in itertools.product order.
+
+    With points (indices into that order, e.g. range(lo, hi)) only those
+    points are built: the result is (n, len(points)).
+    """
+    axes = list(grid)
+    shape = tuple(len(grid[a]) for a in axes)
+    if points is None:
+        out_shape = shape
+
+        def pick(m, k):
+            return m.reshape((n,) + tuple(s if i == k else 1 for i, s in enumerate(shape)))
+    else:
+        points = np.asarray(points, dtype=np.int64)
+        idx = np.unravel_index(points, shape)
+        out_shape = (len(points),)
+
+        def pick(m, k):
+            return m[:, idx[k]]
+
+    buy = np.ones((n,) + (1,) * len(out_shape), dtype=bool)
+    for r in buy_rules:
+        change = pct_dict[(r['symbol'], r['timeframe'], r['lag'])]
+        key = axis_key(r)
+        if key in grid:
+            buy = buy & pick(threshold_masks(change, r, grid[key], "buy"), axes.index(key))
+        else:
+            buy = buy & rule_mask(change, r, "buy").reshape((n,) + (1,) * len(out_shape))
+    buy = np.broadcast_to(buy, (n,) + out_shape)
+
+    sell = np.zeros(n, dtype=bool)
+    for r in sell_rules:
+        sell |= rule_mask(pct_dict[(r['symbol'], r['timeframe'], r['lag'])], r, "sell")
+    sell_codes = np.where(sell, SELL, HOLD).astype(np.int8).reshape((n,) + (1,) * len(out_shape))
+    return np.where(buy, np.int8(BUY), sell_codes)
+
+
+def to_labels(codes: np.ndarray) -> np.ndarray:
+    """Map int8 signal codes back to "BUY" / "SELL" / "HOLD" strings."""
+    return LABELS[np.asarray(codes, dtype=np.int64) + 1]
+
+
+def generate_signals(df_anc: pd.DataFrame,
+                     buy_rules: list,
+                     sell_rules: list,
+                     pct_dict: dict) -> pd.DataFrame:
+    """Vectorized signal generator using precomputed pct changes."""
+    codes = signal_codes(buy_rules, sell_rules, pct_dict, len(df_anc))
+    return pd.DataFrame({"timestamp": df_anc['timestamp'].to_numpy(),
+                         "signal": to_labels(codes)})
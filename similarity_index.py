@@ -0,0 +1,241 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from anchor_store import one_step_returns
+from universe_panel import open_panel
+
+# Approximate nearest-neighbour index of return series, for finding which
+# symbols move like X, or lead X by k candles, without correlating X with
+# every (symbol, lag) of the universe.
+#
+# Every symbol keeps its last WINDOW + MAX_LAG candle returns. Item (Y, k)
+# is the WINDOW-long slice of Y ending k candles before the last row,
+# centered on its own mean and scaled to unit length (missing candles -> the
+# mean), so its dot product with X's last WINDOW returns, prepared the same
+# way, is the Pearson correlation corr(X[t], Y[t - k]) over the window: the
+# same lag convention as lead_lag.lagged_corr_tensor with X as the anchor.
+# With missing candles it is the correlation of the mean-filled windows.
+#
+# Items are hashed with random-hyperplane LSH (SimHash): N_TABLES tables,
+# each keyed by the signs of N_BITS projections. Two series with
+# correlation r share a table's bucket with probability
+# (1 - arccos(r) / pi) ** N_BITS, so a query only reranks the items of its
+# N_TABLES buckets instead of scanning the whole index. More bits
+# -> fewer, closer candidates; more tables -> better recall. Lead-lag
+# correlations of candle returns are weak (~0.1-0.3), so this finds strongly
+# co-moving series far better than faint leads; use lead_lag.py to confirm.
+#
+# Symbols can be added (newly listed coins), replaced and removed at any
+# time; the projections of all lags of a symbol come from one product over
+# a sliding-window view of its returns. Every symbol must be added on the
+# same timeline (last row = now): the index describes the windows ending at
+# that row, and goes stale as new candles arrive until it is rebuilt.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+TIMEFRAME = "1H"
+WINDOW = 24 * 30      # candles per vector
+MAX_LAG = 24          # lags 0..MAX_LAG are indexed per symbol
+N_TABLES = 32
+N_BITS = 8
+MIN_PERIODS = 24 * 7  # symbols with fewer returns in the window are not indexed
+SEED = 0
+INDEX_FILE = "similarity_index.npz"
+QUERY = ["BTC", "ORDI"]
+TOP = 10
+
+
+def unit_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    Rows centered on the mean of their non-NaN values, NaN -> 0, scaled to
+    unit length (all zero for a constant or empty row): the dot product of
+    two such rows is their Pearson correlation.
+    """
+    w = np.array(windows, dtype=float, ndmin=2)
+    valid = ~np.isnan(w)
+    count = valid.sum(axis=1, keepdims=True)
+    mean = np.where(valid, w, 0.0).sum(axis=1, keepdims=True) / np.maximum(count, 1)
+    w = np.where(valid, w - mean, 0.0)
+    norm = np.linalg.norm(w, axis=1, keepdims=True)
+    return w / np.where(norm > 0, norm, 1.0)
+
+
+class SimilarityIndex:
+    """
+    Random-projection LSH over lag-augmented return vectors.
+
+    - add(symbol, returns):      index the last window + max_lag returns (replaces the symbol)
+    - remove(symbol)
+    - query(x, lags, top, ...):  most similar (symbol, lag) items, with their window correlations
+    - save(path) / SimilarityIndex.load(path)
+
+    add() takes returns on the index's timeline, last row = now, for every
+    symbol: items are only comparable when their windows end on the same
+    candle. The index is a snapshot of that row; it goes stale as new
+    candles arrive, until every symbol is added again (e.g. index_closes).
+    """
+
+    def __init__(self, window: int = WINDOW, max_lag: int = MAX_LAG, n_tables: int = N_TABLES,
+                 n_bits: int = N_BITS, min_periods: int = MIN_PERIODS, seed: int = SEED):
+        self.window, self.max_lag = int(window), int(max_lag)
+        self.n_tables, self.n_bits = int(n_tables), int(n_bits)
+        self.min_periods = int(min_periods)
+        self.seed = int(seed)
+        self.planes = np.random.default_rng(seed).standard_normal((n_tables * n_bits, window))
+        self.weights = 1 << np.arange(n_bits, dtype=np.int64)
+        self.series = {}  # symbol -> returns (NaN = missing), (window + max_lag,)
+        self.keys = {}    # symbol -> (max_lag + 1, n_tables) bucket keys per lag
+        self.tables = [{} for _ in range(n_tables)]  # key -> set of (symbol, lag)
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.series
+
+    def _span(self, returns) -> np.ndarray:
+        """The last window + max_lag returns, NaN-padded at the start when shorter."""
+        n = self.window + self.max_lag
+        r = np.asarray(returns, dtype=float)[-n:]
+        return np.concatenate([np.full(n - len(r), np.nan), r])
+
+    def _lag_vectors(self, returns: np.ndarray, lags=None) -> np.ndarray:
+        """(n_lags, window) unit_windows: row k is the window ending lags[k] candles before the last."""
+        windows = np.lib.stride_tricks.sliding_window_view(returns, self.window)[::-1]
+        return unit_windows(windows if lags is None else windows[lags])
+
+    def _keys(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, n_tables) bucket keys of a block of vectors."""
+        bits = (vectors @ self.planes.T > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        return bits @ self.weights
+
+    def add(self, symbol: str, returns) -> bool:
+        """
+        Index a symbol from its candle returns (on the index's timeline, last
+        row = now). Returns False, and leaves the symbol out, when its window
+        has fewer than min_periods returns.
+        """
+        self.remove(symbol)
+        span = self._span(returns)
+        if (~np.isnan(span[-self.window:])).sum() < self.min_periods:
+            return False
+        self._insert(symbol, span)
+        return True
+
+    def _insert(self, symbol: str, span: np.ndarray):
+        keys = self._keys(self._lag_vectors(span))
+        for lag, row in enumerate(keys):
+            for table, key in zip(self.tables, row):
+                table.setdefault(int(key), set()).add((symbol, lag))
+        self.series[symbol], self.keys[symbol] = span, keys
+
+    def remove(self, symbol: str):
+        keys = self.keys.pop(symbol, None)
+        if keys is None:
+            return
+        del self.series[symbol]
+        for lag, row in enumerate(keys):
+            for table, key in zip(self.tables, row):
+                bucket = table[int(key)]
+                bucket.discard((symbol, lag))
+                if not bucket:
+                    del table[int(key)]
+
+    def candidates(self, vector: np.ndarray) -> set:
+        """(symbol, lag) items sharing at least one bucket with a window-long vector."""
+        out = set()
+        for table, key in zip(self.tables, self._keys(vector[None, :])[0]):
+            out |= table.get(int(key), set())
+        return out
+
+    def query(self, x, lags=None, top: int = TOP, absolute: bool = False,
+              exclude_self: bool = True) -> pd.DataFrame:
+        """
+        Items most correlated with x: an indexed symbol (its lag-0 window) or
+        an array of returns ending now. lags restricts the lags returned (e.g.
+        [6] for "leads x by 6 candles"); with absolute, strongly negative
+        correlations are searched for too. Returns Symbol, Lag, Corr sorted
+        by (absolute) correlation.
+        """
+        if isinstance(x, str):
+            q, name = self._lag_vectors(self.series[x], [0])[0], x
+        else:
+            q, name = unit_windows(self._span(x)[-self.window:])[0], None
+        items = self.candidates(q) | (self.candidates(-q) if absolute else set())
+        if lags is not None:
+            keep = set(lags)
+            items = {it for it in items if it[1] in keep}
+        if exclude_self and name is not None:
+            items = {it for it in items if it[0] != name}
+
+        # rerank by the window correlation, one product per candidate symbol for all of its lags
+        by_symbol = {}
+        for symbol, lag in items:
+            by_symbol.setdefault(symbol, []).append(lag)
+        symbols, lag_out, corr = [], [], []
+        for symbol, sym_lags in sorted(by_symbol.items()):
+            sym_lags = np.sort(sym_lags)
+            v = self._lag_vectors(self.series[symbol], sym_lags)
+            c = v @ q
+            c[~v.any(axis=1) | ~q.any()] = np.nan  # constant window: no correlation
+            corr.append(c)
+            symbols += [symbol] * len(sym_lags)
+            lag_out.append(sym_lags)
+        out = pd.DataFrame({"Symbol": symbols,
+                            "Lag": np.concatenate(lag_out or [[]]).astype(np.int64),
+                            "Corr": np.concatenate(corr or [[]])})
+        order = (out['Corr'].abs() if absolute else out['Corr']).sort_values(ascending=False)
+        return out.reindex(order.index).head(top).reset_index(drop=True)
+
+    def save(self, path: str):
+        """Write the index to an .npz file (atomically); buckets are rebuilt on load."""
+        tmp = path + ".tmp.npz"
+        symbols = list(self.series)
+        np.savez(tmp, symbols=np.array(symbols, dtype=str),
+                 config=np.array([self.window, self.max_lag, self.n_tables, self.n_bits,
+                                  self.min_periods, self.seed]),
+                 series=np.array([self.series[s] for s in symbols]).reshape(len(symbols), -1))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        with np.load(path) as z:
+            index = cls(*(int(v) for v in z['config']))
+            for symbol, series in zip(z['symbols'].tolist(), z['series']):
+                index._insert(symbol, series.copy())
+        return index
+
+
+def index_closes(close: np.ndarray, symbols: list, index: SimilarityIndex = None,
+                 **index_kwargs) -> SimilarityIndex:
+    """
+    Add every column of an aligned (T x S) close matrix (e.g. a universe
+    panel block) to an index, new or existing; columns are `symbols`.
+    """
+    if index is None:
+        index = SimilarityIndex(**index_kwargs)
+    close = np.asarray(close, dtype=float)[-(index.window + index.max_lag + 1):]
+    for j, symbol in enumerate(symbols):
+        index.add(symbol, one_step_returns(close[:, j]))
+    return index
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+
+    panel = open_panel(TIMEFRAME)
+    index = index_closes(panel.values('close'), panel.symbols)
+    index.save(INDEX_FILE)
+    print(f"✅ {len(index)} of {len(panel.symbols)} symbols indexed "
+          f"({WINDOW} candles, lags 0..{MAX_LAG}) -> {INDEX_FILE}")
+
+    for symbol in QUERY:
+        print(f"\nMoves like {symbol} (same candle):")
+        print(index.query(symbol, lags=[0]).to_string(index=False))
+        print(f"\nLeads {symbol} by 1..{MAX_LAG} candles:")
+        print(index.query(symbol, lags=range(1, MAX_LAG + 1), absolute=True).to_string(index=False))
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
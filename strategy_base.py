@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 # This is a strategy template for non-devs who can just change 
@@ -48,45 +49,36 @@ def generate_signals(candles_target: pd.DataFrame, candles_anchor: pd.DataFrame)
                 raise ValueError(f"Missing required column in anchor data: {col}")
             df[col] = candles_anchor[col].values
 
-        signals = []
-        for i in range(len(df)):
-            buy_pass = True
-            sell_pass = False
+        # Evaluate every rule once over the whole series as a boolean mask:
+        # BUY rules are AND-ed, SELL rules are OR-ed, BUY wins over SELL.
+        n = len(df)
+        buy_mask = np.ones(n, dtype=bool)
+        for rule in BUY_RULES:
+            col = f"close_{rule['symbol']}_{rule['timeframe']}"
+            if col not in df.columns:
+                buy_mask[:] = False
+                break
+            change = df[col].pct_change().shift(rule['lag']).to_numpy(dtype=float)
+            valid = df[col].notna().to_numpy() & ~np.isnan(change)
+            if rule['direction'] == 'up':
+                valid &= change > rule['change_pct'] / 100
+            if rule['direction'] == 'down':
+                valid &= change < rule['change_pct'] / 100
+            buy_mask &= valid
 
-            for rule in BUY_RULES:
-                col = f"close_{rule['symbol']}_{rule['timeframe']}"
-                if col not in df.columns or pd.isna(df[col].iloc[i]):
-                    buy_pass = False
-                    break
-                change = df[col].pct_change().shift(rule['lag']).iloc[i]
-                if pd.isna(change):
-                    buy_pass = False
-                    break
-                if rule['direction'] == 'up' and change <= rule['change_pct'] / 100:
-                    buy_pass = False
-                    break
-                if rule['direction'] == 'down' and change >= rule['change_pct'] / 100:
-                    buy_pass = False
-                    break
+        sell_mask = np.zeros(n, dtype=bool)
+        for rule in SELL_RULES:
+            col = f"close_{rule['symbol']}_{rule['timeframe']}"
+            if col not in df.columns:
+                continue
+            change = df[col].pct_change().shift(rule['lag']).to_numpy(dtype=float)
+            valid = df[col].notna().to_numpy() & ~np.isnan(change)
+            if rule['direction'] == 'down':
+                sell_mask |= valid & (change <= rule['change_pct'] / 100)
+            if rule['direction'] == 'up':
+                sell_mask |= valid & (change >= rule['change_pct'] / 100)
 
-            for rule in SELL_RULES:
-                col = f"close_{rule['symbol']}_{rule['timeframe']}"
-                if col not in df.columns or pd.isna(df[col].iloc[i]):
-                    continue
-                change = df[col].pct_change().shift(rule['lag']).iloc[i]
-                if pd.isna(change):
-                    continue
-                if rule['direction'] == 'down' and change <= rule['change_pct'] / 100:
-                    sell_pass = True
-                if rule['direction'] == 'up' and change >= rule['change_pct'] / 100:
-                    sell_pass = True
-
-            if buy_pass:
-                signals.append("BUY")
-            elif sell_pass:
-                signals.append("SELL")
-            else:
-                signals.append("HOLD")
+        signals = np.where(buy_mask, "BUY", np.where(sell_mask, "SELL", "HOLD")).astype(object)
 
         df['signal'] = signals
         return df[['timestamp', 'signal']]
@@ -0,0 +1,430 @@
+import itertools
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from anchor_store import AnchorStore
+from backtest_engine import run_backtest, signal_fingerprint
+from candle_store import load_arrays
+from metrics import batch_metrics, perf_scores, periods_per_year, trade_stats
+from result_writer import ResultWriter, read_results
+from search import run_search
+from signal_engine import grid_signal_codes, signal_codes
+
+# Parallel version of Nicholas/backtest_loop_v3_a.py.
+#
+# The anchor close series are loaded once in the parent and copied into two
+# shared-memory blocks (timestamps + closes). Pool workers map those blocks
+# as numpy views in their initializer, so the anchors are never pickled per
+# task. Each task is a (symbol, range of grid points) triple and results are
+# merged back in task order, so the output matches a serial run row for row.
+# Within a task the signals of all grid points come from one vectorized
+# grid_signal_codes call, points whose signals produce the same trades
+# share one backtest, and the equity curves of the remaining points are
+# reduced together by metrics.batch_metrics.
+#
+# With a results path, finished tasks are streamed into a ResultWriter
+# (result_writer.py) instead of being held in memory; a rerun with the same
+# configuration skips the tasks already committed there.
+
+# ========== CONFIGURATION (EDIT THIS SECTION ONLY) ==========
+TIMEFRAME = "1H"  # timeframe suffix on your Data/*.csv files
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data")
+RESULTS_FILE = "results_comparison.csv"
+RESULTS_STORE = "results_store"  # resumable columnar store, exported to RESULTS_FILE
+WORKERS = os.cpu_count()  # 1 runs everything in-process
+CHUNKS_PER_SYMBOL = 1     # split each symbol's grid into this many tasks
+INITIAL_CASH = 10_000.0
+METRICS_BLOCK = 64        # equity curves reduced together by metrics.batch_metrics
+
+ANCHORS = [
+    {"symbol": "BTC", "timeframe": "1H", "lag": 4},
+    {"symbol": "ETH", "timeframe": "1H", "lag": 4},
+    {"symbol": "SOL", "timeframe": "1H", "lag": 4},
+    {"symbol": "BTC", "timeframe": "4H", "lag": 0},
+]
+
+# Base BUY rules (change_pct is overridden per anchor symbol by GRID)
+BUY_RULES = [
+    {"symbol": "BTC", "timeframe": "1H", "lag": 4, "change_pct": -4.5, "direction": "down"},
+    {"symbol": "ETH", "timeframe": "1H", "lag": 4, "change_pct": -4.5, "direction": "down"},
+    {"symbol": "SOL", "timeframe": "1H", "lag": 4, "change_pct": -4.5, "direction": "down"},
+]
+
+SELL_RULES = [
+    {"symbol": "BTC", "timeframe": "1H", "lag": 0, "change_pct": -2.0, "direction": "down"},
+]
+
+# change_pct values swept for the BUY rules of each anchor symbol
+GRID = {
+    "BTC": np.arange(-4.5, 15.5, 1),
+    "ETH": np.arange(-2.0, 5.5, 1),
+}
+
+# How GRID is explored per symbol (see search.py): "exhaustive", "random",
+# "coarse_to_fine" or "successive_halving". The budget counts full-history
+# backtests (None = the whole grid); SEED makes non-exhaustive searches repeatable.
+SEARCH = "exhaustive"
+SEARCH_BUDGET = None
+SEED = 0
+SCORE_KEY = "Total return"
+
+
+# ========== SWEEP ENGINE ==========
+
+def list_symbols(timeframe: str = TIMEFRAME, data_dir: str = DATA_DIR) -> list:
+    """All target symbols with a SYMBOL_TIMEFRAME.csv file in data_dir."""
+    suffix = f"_{timeframe}.csv"
+    return sorted(f[:-len(suffix)] for f in os.listdir(data_dir) if f.endswith(suffix))
+
+
+def grid_combos(grid: dict, lo: int = 0, hi: int = None) -> list:
+    """Cartesian product of the grid (points [lo, hi)) as a list of {symbol: change_pct} dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.islice(itertools.product(*grid.values()), lo, hi)]
+
+
+def apply_combo(buy_rules: list, combo: dict) -> list:
+    """Override change_pct of every BUY rule whose symbol is swept in combo."""
+    return [{**r, 'change_pct': combo[r['symbol']]} if r['symbol'] in combo else r
+            for r in buy_rules]
+
+
+def evaluate_combo(candles, buy_rules: list, sell_rules: list, pct_dict: dict,
+                   initial_cash: float = INITIAL_CASH, timeframe: str = TIMEFRAME) -> dict:
+    """Backtest one rule set on target candles (DataFrame or column dict)."""
+    codes = signal_codes(buy_rules, sell_rules, pct_dict, len(candles['open']))
+    return evaluate_codes(candles, codes, initial_cash, timeframe)
+
+
+def evaluate_codes(candles, codes: np.ndarray, initial_cash: float = INITIAL_CASH,
+                   timeframe: str = TIMEFRAME) -> dict:
+    """Backtest one int8 signal vector on target candles and compute the metrics."""
+    return evaluate_batch(candles, np.asarray(codes)[:, None], initial_cash, timeframe)[0]
+
+
+def evaluate_batch(candles, codes: np.ndarray, initial_cash: float = INITIAL_CASH,
+                   timeframe: str = TIMEFRAME) -> list:
+    """
+    Backtest every column of an (n x k) signal matrix and return one metrics
+    dict per column. The equity curves of up to METRICS_BLOCK columns are
+    stacked and reduced together by metrics.batch_metrics; the scores are
+    those of Nicholas/eval.py (annualized mean / std of the candle returns,
+    peak and trough of the max drawdown).
+    """
+    opens, closes = np.asarray(candles['open']), np.asarray(candles['close'])
+    n, k = codes.shape
+    periods = periods_per_year(timeframe)
+    block = min(k, METRICS_BLOCK)
+    equity = np.empty((block, n))
+    holding = np.empty((block, n), dtype=bool)
+
+    out = []
+    for lo in range(0, k, block):
+        cols = range(lo, min(k, lo + block))
+        entry_price, exit_price = [], []
+        for i, j in enumerate(cols):
+            bt = run_backtest(opens, closes, codes[:, j], initial_cash)
+            equity[i], holding[i] = bt.equity, bt.holding
+            entry_price.append(bt.entry_price)
+            exit_price.append(bt.exit_price)
+
+        g = len(cols)
+        m = batch_metrics(equity[:g], periods, holding[:g], initial_cash)
+        group = np.repeat(np.arange(g), [len(p) for p in entry_price])
+        trades = trade_stats(np.concatenate(entry_price), np.concatenate(exit_price), group, g)
+        scores = perf_scores(initial_cash, m['final'], m['ann_mean'], m['ann_std'], m['peak'], m['trough'])
+
+        for i in range(g):
+            out.append({
+                "Initial cash": initial_cash,
+                "Final cash": float(m['final'][i]),
+                "Total return": float(m['total_return'][i]),
+                "Trades": int(trades['trades'][i]),
+                "Win rate": float(trades['win_rate'][i]),
+                "Sharpe ratio": float(m['sharpe'][i]),
+                "Max drawdown": float(m['max_drawdown'][i]),
+                "Exposure": float(m['exposure'][i]),
+                "Return score": float(scores['returns_score'][i]),
+                "Sharpe score": float(scores['sharpe_score'][i]),
+                "Drawdown score": float(scores['dd_score'][i]),
+                "Perf score": float(scores['total_score'][i]),
+                "Passed": bool(scores['passed'][i]),
+            })
+    return out
+
+
+# --- shared anchor panel ------------------------------------------------------
+
+def share_anchors(anchors: list, data_dir: str = DATA_DIR):
+    """
+    Load every distinct anchor series once and copy it into shared memory.
+
+    Returns (blocks, meta): the SharedMemory blocks owned by the caller (close
+    and unlink them when done) and a small picklable dict that workers use to
+    map them back as numpy arrays.
+    """
+    series = {}
+    for a in anchors:
+        key = (a['symbol'], a['timeframe'])
+        if key not in series:
+            cols = load_arrays(a['symbol'], a['timeframe'], data_dir=data_dir)
+            series[key] = (cols['timestamp'], cols['close'])
+
+    offsets = np.cumsum([0] + [len(ts) for ts, _ in series.values()])
+    total = int(offsets[-1])
+    ts_block = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+    close_block = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+    ts_all = np.ndarray((total,), dtype=np.int64, buffer=ts_block.buf)
+    close_all = np.ndarray((total,), dtype=np.float64, buffer=close_block.buf)
+    for (ts, close), start, end in zip(series.values(), offsets[:-1], offsets[1:]):
+        ts_all[start:end] = ts
+        close_all[start:end] = close
+
+    meta = {
+        "ts_name": ts_block.name,
+        "close_name": close_block.name,
+        "total": total,
+        "spans": {key: (int(s), int(e)) for key, s, e in zip(series, offsets[:-1], offsets[1:])},
+    }
+    return (ts_block, close_block), meta
+
+
+# Worker-side state, filled by _init_worker
+_BLOCKS = ()
+_ANCHOR_VIEWS = {}
+_STORE = None
+_SPEC = {}
+
+
+def _init_worker(meta: dict, spec: dict):
+    """Map the shared anchor blocks into this process (no copy)."""
+    global _BLOCKS, _ANCHOR_VIEWS, _STORE, _SPEC
+    ts_block = shared_memory.SharedMemory(name=meta['ts_name'])
+    close_block = shared_memory.SharedMemory(name=meta['close_name'])
+    ts_all = np.ndarray((meta['total'],), dtype=np.int64, buffer=ts_block.buf)
+    close_all = np.ndarray((meta['total'],), dtype=np.float64, buffer=close_block.buf)
+    _BLOCKS = (ts_block, close_block)
+    _ANCHOR_VIEWS = {key: (ts_all[s:e], close_all[s:e]) for key, (s, e) in meta['spans'].items()}
+    # derived returns are cached per worker on top of the shared closes
+    _STORE = AnchorStore(loader=lambda symbol, timeframe: _ANCHOR_VIEWS[(symbol, timeframe)])
+    _SPEC = spec
+
+
+def _release_worker():
+    """Drop the anchor views and detach from the shared blocks."""
+    global _BLOCKS, _ANCHOR_VIEWS, _STORE
+    _ANCHOR_VIEWS = {}
+    _STORE = None
+    for b in _BLOCKS:
+        b.close()
+    _BLOCKS = ()
+
+
+def run_task(task):
+    """
+    Evaluate grid points [lo, hi) of one symbol against the shared anchors.
+
+    Returns (rows, evaluated, skipped): grid points whose signals produce
+    the same trades as an earlier point (same signal_fingerprint) reuse its
+    metrics instead of being backtested again.
+    """
+    sym, lo, hi = task
+    spec = _SPEC
+    candles = load_arrays(sym, spec['timeframe'], data_dir=spec['data_dir'])
+    n = len(candles['timestamp'])
+
+    # pct-change + shift for every rule, on the target's timeline
+    pct_dict = _STORE.pct_dict(spec['buy_rules'] + spec['sell_rules'], candles['timestamp'])
+    if spec['search'] != "exhaustive" or spec['budget'] is not None:
+        return search_task(sym, candles, pct_dict, spec)
+
+    # signals of the task's grid points at once, one column per point
+    codes = grid_signal_codes(spec['buy_rules'], spec['sell_rules'], pct_dict, n,
+                              spec['grid'], points=range(lo, hi))
+
+    # one backtest per distinct trade set, all of them scored in one batch
+    fps = [signal_fingerprint(codes[:, j]) for j in range(hi - lo)]
+    first = {}
+    for j, fp in enumerate(fps):
+        first.setdefault(fp, j)
+    memo = dict(zip(first, evaluate_batch(candles, codes[:, list(first.values())],
+                                          spec['initial_cash'], spec['timeframe'])))
+
+    rows = []
+    for fp, combo in zip(fps, grid_combos(spec['grid'], lo, hi)):
+        row = {"Symbol": sym}
+        row.update({f"{s}_cp": cp for s, cp in combo.items()})
+        row.update(memo[fp])
+        rows.append(row)
+    return rows, len(rows), len(rows) - len(memo)
+
+
+def make_evaluator(candles, buy_rules: list, sell_rules: list, pct_dict: dict,
+                   initial_cash: float = INITIAL_CASH, timeframe: str = TIMEFRAME):
+    """
+    evaluate(values, fraction) for search.run_search: backtests one grid
+    point on the most recent `fraction` of the candles. Results are memoized
+    by (start row, signal fingerprint); evaluate.memo holds them.
+    """
+    n = len(candles['timestamp'])
+    opens, closes = np.asarray(candles['open']), np.asarray(candles['close'])
+    memo = {}
+
+    def evaluate(values: dict, fraction: float = 1.0) -> dict:
+        codes = grid_signal_codes(buy_rules, sell_rules, pct_dict, n,
+                                  {a: [v] for a, v in values.items()}).reshape(n)
+        start = n - int(round(n * fraction))
+        key = (start, signal_fingerprint(codes[start:]))
+        if key not in memo:
+            memo[key] = evaluate_codes({'open': opens[start:], 'close': closes[start:]},
+                                       codes[start:], initial_cash, timeframe)
+        return memo[key]
+
+    evaluate.memo = memo
+    return evaluate
+
+
+def search_task(sym: str, candles, pct_dict: dict, spec: dict):
+    """Explore one symbol's grid with spec['search']; returns (rows, evaluated, skipped) like run_task."""
+    evaluate = make_evaluator(candles, spec['buy_rules'], spec['sell_rules'], pct_dict,
+                              spec['initial_cash'], spec['timeframe'])
+    log = run_search(spec['grid'], evaluate, spec['search'], spec['budget'], spec['seed'],
+                     spec['score_key'])
+    if log.empty:
+        return [], 0, 0
+    full = log[log['Fidelity'] == 1.0].drop(columns=['Fidelity', 'Score'])
+    rows = [{"Symbol": sym, **r} for r in full.to_dict('records')]
+    return rows, len(log), len(log) - len(evaluate.memo)
+
+
+def make_tasks(symbols: list, n_combos: int, chunks: int = 1) -> list:
+    """Split every symbol's grid points into `chunks` contiguous (symbol, lo, hi) tasks."""
+    bounds = np.linspace(0, n_combos, max(chunks, 1) + 1).astype(int)
+    return [(sym, int(lo), int(hi)) for sym in symbols
+            for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def task_key(task) -> str:
+    """Commit-log key of a (symbol, lo, hi) task."""
+    return "{}:{}:{}".format(*task)
+
+
+def store_meta(spec: dict, anchors: list, chunks: int) -> dict:
+    """
+    JSON-safe description of a sweep configuration. A results directory only
+    accepts runs with the same meta, since task keys and rows depend on it.
+    """
+    return {
+        "anchors": anchors,
+        "buy_rules": spec['buy_rules'],
+        "sell_rules": spec['sell_rules'],
+        "timeframe": spec['timeframe'],
+        "initial_cash": float(spec['initial_cash']),
+        "grid": {a: np.asarray(v).tolist() for a, v in spec['grid'].items()},
+        "search": spec['search'],
+        "budget": spec['budget'],
+        "seed": spec['seed'],
+        "score_key": spec['score_key'],
+        "chunks": chunks,
+    }
+
+
+def run_sweep(symbols: list,
+              anchors: list = ANCHORS,
+              buy_rules: list = BUY_RULES,
+              sell_rules: list = SELL_RULES,
+              grid: dict = GRID,
+              workers: int = WORKERS,
+              chunks: int = CHUNKS_PER_SYMBOL,
+              timeframe: str = TIMEFRAME,
+              data_dir: str = DATA_DIR,
+              initial_cash: float = INITIAL_CASH,
+              search: str = SEARCH,
+              budget: float = SEARCH_BUDGET,
+              seed: int = SEED,
+              score_key: str = SCORE_KEY,
+              results_path: str = None) -> pd.DataFrame:
+    """
+    Run the sweep for every symbol, in parallel when workers > 1. With the
+    exhaustive search and no budget every grid point is backtested;
+    otherwise each symbol is one task driven by search.run_search.
+
+    With results_path, rows are streamed into that results directory as
+    tasks finish, tasks committed by an earlier run with the same
+    configuration are skipped, and the returned frame holds all committed
+    rows. The evaluated / skipped attrs only count this run.
+    """
+    spec = {
+        "buy_rules": buy_rules,
+        "sell_rules": sell_rules,
+        "timeframe": timeframe,
+        "data_dir": data_dir,
+        "initial_cash": initial_cash,
+        "grid": grid,
+        "search": search,
+        "budget": budget,
+        "seed": seed,
+        "score_key": score_key,
+    }
+    full_grid = search == "exhaustive" and budget is None
+    chunks = chunks if full_grid else 1
+    tasks = make_tasks(symbols, int(np.prod([len(v) for v in grid.values()])), chunks)
+
+    writer = None
+    if results_path is not None:
+        writer = ResultWriter(results_path, meta=store_meta(spec, anchors, chunks),
+                              str_widths={"Symbol": max([len(s.encode()) for s in symbols] + [1])})
+        tasks = [t for t in tasks if task_key(t) not in writer.done]
+
+    collected, stats = [], [0, 0]
+
+    def consume(parts):
+        for task, (rows, evaluated, skipped) in zip(tasks, parts):
+            stats[0] += evaluated
+            stats[1] += skipped
+            if writer is not None:
+                writer.add(task_key(task), rows)
+            else:
+                collected.extend(rows)
+
+    blocks, meta = share_anchors(anchors, data_dir)
+    try:
+        if workers <= 1:
+            _init_worker(meta, spec)
+            try:
+                consume(map(run_task, tasks))
+            finally:
+                _release_worker()
+        else:
+            with Pool(workers, initializer=_init_worker, initargs=(meta, spec)) as pool:
+                # imap keeps task order, so rows are written as soon as their turn comes
+                consume(pool.imap(run_task, tasks, chunksize=1))
+    finally:
+        if writer is not None:
+            writer.close()  # commits every task that finished, even on Ctrl-C
+        for b in blocks:
+            b.close()
+            b.unlink()
+
+    results = read_results(results_path) if writer is not None else pd.DataFrame(collected)
+    results.attrs["evaluated"], results.attrs["skipped"] = stats
+    return results
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+
+    symbols = list_symbols(TIMEFRAME, DATA_DIR)
+    results = run_sweep(symbols, results_path=RESULTS_STORE)
+
+    results.to_csv(RESULTS_FILE, index=False)
+    print(f"✅ Results written to {RESULTS_FILE}")
+    print(f"   {results.attrs['skipped']} of {results.attrs['evaluated']} evaluations reused "
+          f"the metrics of an identical signal")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import sys
+
+import aiohttp
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "get_OLHCV_data"))
+
+from async_get_data import WeightBucket, backfill, request_json  # noqa: E402
+from kline_stub_server import KlineStubServer  # noqa: E402
+from manifest import Manifest  # noqa: E402
+
+HOUR = 3_600_000
+START = 1_735_689_600_000  # 01/01/25 00:00 UTC
+NOW = START + 2500 * HOUR + HOUR // 2  # mid-candle: the forming bar is dropped
+
+
+@pytest.fixture
+def stub():
+    server = KlineStubServer(weight_limit=2, window_seconds=1, default_listing=START)
+    base_url = server.start()
+    yield server, base_url
+    server.stop()
+
+
+def open_times(path: str) -> list:
+    with open(path) as f:
+        return [int(line.split(",")[0]) for line in f.read().splitlines()[1:] if line]
+
+
+def test_backfill_survives_429_and_resumes(stub, tmp_path):
+    server, base_url = stub
+    url = base_url + "/api/v3/klines"
+    folder = str(tmp_path)
+    # the client thinks it may send far more than the stub's one request a second
+    counts = asyncio.run(backfill(["AAAUSDT"], ["1h"], folder, url, "01/01/25",
+                                  WeightBucket(capacity=1000, per_seconds=1), NOW - 500 * HOUR))
+    assert counts == {("AAAUSDT", "1h"): 2000}
+    assert server.rejected > 0
+    assert open_times(os.path.join(folder, "AAA_1H.csv")) == [START + i * HOUR for i in range(2000)]
+
+    # a later run only asks for the candles after the last written one
+    server.requests.clear()
+    counts = asyncio.run(backfill(["AAAUSDT"], ["1h"], folder, url, "01/01/25",
+                                  WeightBucket(capacity=1000, per_seconds=1), NOW))
+    assert counts == {("AAAUSDT", "1h"): 500}
+    starts = [int(q["startTime"]) for path, q in server.requests if path == "/api/v3/klines"]
+    assert min(starts) == START + 2000 * HOUR
+    assert open_times(os.path.join(folder, "AAA_1H.csv")) == [START + i * HOUR for i in range(2500)]
+    assert Manifest(folder).last_open_time("AAA_1H.csv") == START + 2499 * HOUR
+
+
+def test_permanent_client_error_is_not_retried(stub):
+    server, base_url = stub
+
+    async def get():
+        async with aiohttp.ClientSession() as session:
+            return await request_json(session, WeightBucket(), asyncio.Semaphore(1),
+                                      base_url + "/api/v3/klines", {"symbol": "AAAUSDT"})
+
+    with pytest.raises(RuntimeError, match="HTTP 400"):
+        asyncio.run(get())
+    assert len(server.requests) == 1
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "get_OLHCV_data"))
+
+from candle_store import has_series, load_arrays, write_series  # noqa: E402
+from fill_gaps import splice_rows  # noqa: E402
+from ingest import ingest  # noqa: E402
+from manifest import Manifest  # noqa: E402
+
+HOUR = 3_600_000
+
+
+def candle(i: int) -> list:
+    return [i * HOUR, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0 * i]
+
+
+def data_rows(path: str) -> list:
+    with open(path) as f:
+        return [line for line in f.read().splitlines()[1:] if line]
+
+
+def test_gap_refill_is_reingested(tmp_path):
+    src, dst, store = tmp_path / "raw", tmp_path / "Data", tmp_path / "Store"
+    src.mkdir()
+    fname = "TEST_1H.csv"
+    Manifest(str(src)).append(fname, [candle(i) for i in range(20) if i not in (7, 8)])
+
+    assert ingest(str(src), str(dst), str(store)) == {fname: 18}
+    ingested = load_arrays("TEST", "1H", data_dir=str(dst), store_dir=str(store))
+    write_series("TEST", "1H", ingested, str(store))
+    assert has_series("TEST", "1H", str(store))
+
+    # the refill inserts rows mid-file: the file grows but its first row is unchanged
+    assert splice_rows(str(src / fname), [candle(7), candle(8)]) == 2
+    assert ingest(str(src), str(dst), str(store)) == {fname: 20}
+
+    rows = data_rows(str(dst / fname))
+    assert [int(r.split(",")[0]) for r in rows] == [i * HOUR for i in range(20)]
+    stored = load_arrays("TEST", "1H", store_dir=str(store))
+    assert list(stored['timestamp']) == [i * HOUR for i in range(20)]
+    assert ingest(str(src), str(dst), str(store)) == {}
+
+
+def test_appended_rows_are_ingested_once(tmp_path):
+    src, dst, store = tmp_path / "raw", tmp_path / "Data", tmp_path / "Store"
+    src.mkdir()
+    fname = "TEST_1H.csv"
+    manifest = Manifest(str(src))
+    manifest.append(fname, [candle(i) for i in range(10)])
+    assert ingest(str(src), str(dst), str(store)) == {fname: 10}
+    write_series("TEST", "1H", load_arrays("TEST", "1H", data_dir=str(dst), store_dir=str(store)), str(store))
+
+    manifest.append(fname, [candle(i) for i in range(10, 15)])
+    assert ingest(str(src), str(dst), str(store)) == {fname: 5}
+    assert len(data_rows(str(dst / fname))) == 15
+    assert ingest(str(src), str(dst), str(store)) == {}
+
+    # the store was extended in place and is current for the analysis copy
+    stored = load_arrays("TEST", "1H", data_dir=str(dst), store_dir=str(store))
+    assert isinstance(stored['close'], np.memmap)
+    assert list(stored['timestamp']) == [i * HOUR for i in range(15)]
+    assert list(stored['volume']) == [10.0 * i for i in range(15)]
+
+
+def test_first_ingest_fills_holes_in_existing_copy(tmp_path):
+    src, dst = tmp_path / "raw", tmp_path / "Data"
+    src.mkdir()
+    dst.mkdir()
+    fname = "TEST_1H.csv"
+    Manifest(str(src)).append(fname, [candle(i) for i in range(12)])
+    Manifest(str(dst)).append(fname, [candle(i) for i in range(10) if i != 4])
+
+    assert ingest(str(src), str(dst), None) == {fname: 12}
+    assert [int(r.split(",")[0]) for r in data_rows(str(dst / fname))] == [i * HOUR for i in range(12)]
@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from candle_store import DATA_DIR, STORE_DIR, PRICE_COLUMNS, list_symbols, load_arrays, replace_dir, to_ms
+
+# Aligned (time x symbol) panels for cross-sectional work.
+#
+# One panel per timeframe lives in Store/panels/<TIMEFRAME>/:
+#   timestamps.npy   int64 (T,)  union of every symbol's candle times (ms)
+#   <plane>.npy      float32 (T, S) per plane, NaN where a symbol has no candle
+#   valid.npy        uint8 (ceil(T/8), S) bitmap, bit set where the symbol has a candle
+#   first_valid.npy  int64 (S,) row of each symbol's first candle (its listing)
+#   meta.json        timeframe, symbols, planes, the symbol list asked for
+#                    (null = every symbol) and the sources it was built from
+#
+# open_panel rebuilds a panel built from other data / store directories, for
+# another symbol list or without a requested plane, or older than the newest
+# source file (CSV or stored series), so a caller never silently reads a
+# panel of another request or of a stale data directory. Series are read
+# through candle_store.load_arrays, which parses a CSV that changed since
+# its stored copy was converted, so a rebuild sees the new rows.
+#
+# Arrays are opened as read-only memory maps. A time range or a single
+# symbol is a view; a list of symbols is a view when the symbols are
+# adjacent in the panel and a copy otherwise.
+
+# ========== CONFIGURATION ==========
+TIMEFRAMES = ["1H", "4H", "1D"]
+PLANES = ("close",)  # add "open", "high", "low", "volume" for full OHLCV planes
+PANEL_DIR = os.path.join(STORE_DIR, "panels")
+
+
+def panel_path(timeframe: str, panel_dir: str = PANEL_DIR) -> str:
+    return os.path.join(panel_dir, timeframe.upper())
+
+
+def source_mtime(timeframe: str, store_dir: str = STORE_DIR, data_dir: str = DATA_DIR) -> int:
+    """Newest mtime (ns) of a timeframe's sources: its CSVs in data_dir and stored series."""
+    stamps = [0]
+    if data_dir is not None and os.path.isdir(data_dir):
+        suffix = f"_{timeframe.upper()}.csv"
+        stamps += [e.stat().st_mtime_ns for e in os.scandir(data_dir) if e.name.endswith(suffix)]
+    d = os.path.join(store_dir, timeframe.upper())
+    if os.path.isdir(d):
+        # write_series swaps whole series directories in, which touches their mtimes
+        stamps.append(os.stat(d).st_mtime_ns)
+        stamps += [e.stat().st_mtime_ns for e in os.scandir(d)]
+    return max(stamps)
+
+
+def _sources(store_dir: str, data_dir: str) -> dict:
+    return {"store_dir": os.path.abspath(store_dir),
+            "data_dir": None if data_dir is None else os.path.abspath(data_dir)}
+
+
+def build_panel(timeframe: str,
+                planes=PLANES,
+                symbols: list = None,
+                panel_dir: str = PANEL_DIR,
+                store_dir: str = STORE_DIR,
+                data_dir: str = DATA_DIR) -> str:
+    """Build (or rebuild) the panel of one timeframe from the candle store."""
+    planes = tuple(planes)
+    unknown = [p for p in planes if p not in PRICE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown planes {unknown}, expected a subset of {PRICE_COLUMNS}")
+    built_from = source_mtime(timeframe, store_dir, data_dir)  # before reading: later writes count
+    requested = None if symbols is None else list(symbols)
+    if symbols is None:
+        symbols = list_symbols(timeframe, store_dir, data_dir)
+    series = {s: load_arrays(s, timeframe, store_dir=store_dir, data_dir=data_dir) for s in symbols}
+
+    axis = np.unique(np.concatenate([np.asarray(c['timestamp']) for c in series.values()]
+                                    or [np.empty(0, np.int64)]))
+    n_rows, n_cols = len(axis), len(symbols)
+
+    final = panel_path(timeframe, panel_dir)
+    tmp = final + ".tmp"
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+
+    np.save(os.path.join(tmp, "timestamps.npy"), axis)
+    valid = np.zeros((n_rows, n_cols), dtype=bool)
+    first_valid = np.full(n_cols, n_rows, dtype=np.int64)
+    mats = {p: np.lib.format.open_memmap(os.path.join(tmp, f"{p}.npy"), mode='w+',
+                                         dtype=np.float32, shape=(n_rows, n_cols))
+            for p in planes}
+    for m in mats.values():
+        m[:] = np.nan
+
+    for j, s in enumerate(symbols):
+        cols = series[s]
+        rows = np.searchsorted(axis, np.asarray(cols['timestamp']))
+        valid[rows, j] = True
+        if len(rows):
+            first_valid[j] = rows[0]
+        for p, m in mats.items():
+            m[rows, j] = np.asarray(cols[p], dtype=np.float32)
+
+    for m in mats.values():
+        m.flush()
+    del mats
+    np.save(os.path.join(tmp, "valid.npy"), np.packbits(valid, axis=0))
+    np.save(os.path.join(tmp, "first_valid.npy"), first_valid)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"timeframe": timeframe.upper(), "symbols": list(symbols),
+                   "requested_symbols": requested, "planes": list(planes),
+                   "sources": _sources(store_dir, data_dir),
+                   "source_mtime": built_from}, f)
+
+    replace_dir(tmp, final)
+    return final
+
+
+class UniversePanel:
+    """Read-only, memory-mapped view of a built panel."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.path = path
+        self.timeframe = meta['timeframe']
+        self.symbols = meta['symbols']
+        self.timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode='r')
+        self.planes = {p: np.load(os.path.join(path, f"{p}.npy"), mmap_mode='r')
+                       for p in meta['planes']}
+        self.first_valid = np.load(os.path.join(path, "first_valid.npy"), mmap_mode='r')
+        self._valid_bits = np.load(os.path.join(path, "valid.npy"), mmap_mode='r')
+        self._col = {s: j for j, s in enumerate(self.symbols)}
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.timestamps), len(self.symbols)
+
+    def rows(self, start=None, end=None) -> slice:
+        """Row slice covering [start, end)."""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, to_ms(start), side='left'))
+        hi = len(self.timestamps) if end is None else \
+            int(np.searchsorted(self.timestamps, to_ms(end), side='left'))
+        return slice(lo, hi)
+
+    def columns(self, symbols=None):
+        """Column selector: a slice for None / adjacent symbols, an int for one symbol."""
+        if symbols is None:
+            return slice(None)
+        if isinstance(symbols, str):
+            return self._col[symbols]
+        idx = np.array([self._col[s] for s in symbols], dtype=np.int64)
+        if len(idx) and np.array_equal(idx, np.arange(idx[0], idx[0] + len(idx))):
+            return slice(int(idx[0]), int(idx[0]) + len(idx))
+        return idx
+
+    def values(self, plane: str = "close", symbols=None, start=None, end=None) -> np.ndarray:
+        """(time x symbol) block of one plane."""
+        return self.planes[plane][self.rows(start, end), self.columns(symbols)]
+
+    def valid(self, symbols=None, start=None, end=None) -> np.ndarray:
+        """Boolean mask of the candles that exist (False before listing and in gaps)."""
+        r = self.rows(start, end)
+        byte_lo, byte_hi = r.start // 8, (r.stop + 7) // 8
+        bits = np.unpackbits(self._valid_bits[byte_lo:byte_hi, self.columns(symbols)], axis=0)
+        return bits[r.start - byte_lo * 8:r.stop - byte_lo * 8].astype(bool)
+
+    def to_frame(self, plane: str = "close", symbols=None, start=None, end=None) -> pd.DataFrame:
+        """The block as a DataFrame indexed by timestamp with one column per symbol."""
+        r = self.rows(start, end)
+        cols = self.columns(symbols)
+        names = np.array(self.symbols)[cols]
+        block = self.planes[plane][r, cols]
+        if block.ndim == 1:
+            block, names = block[:, None], [names]
+        index = pd.DatetimeIndex(np.asarray(self.timestamps[r]).astype('datetime64[ms]'),
+                                 name='timestamp')
+        return pd.DataFrame(block, index=index, columns=list(names))
+
+
+def panel_is_current(path: str, store_dir: str = STORE_DIR, data_dir: str = DATA_DIR,
+                     planes=PLANES, symbols: list = None) -> bool:
+    """
+    True when the panel at path was built from these directories, for this
+    symbol list (None = every symbol) with at least these planes, and no
+    source changed since.
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    requested = None if symbols is None else list(symbols)
+    return meta.get("sources") == _sources(store_dir, data_dir) and \
+        "requested_symbols" in meta and meta['requested_symbols'] == requested and \
+        set(planes) <= set(meta['planes']) and \
+        meta.get("source_mtime", -1) >= source_mtime(meta['timeframe'], store_dir, data_dir)
+
+
+def open_panel(timeframe: str, panel_dir: str = PANEL_DIR, build: bool = True, **build_kwargs) -> UniversePanel:
+    """
+    Open a timeframe's panel, building it first when it does not exist yet,
+    or rebuilding it when it is not current for build_kwargs' store_dir /
+    data_dir / planes / symbols (see panel_is_current). With build=False
+    the panel is opened as is.
+    """
+    path = panel_path(timeframe, panel_dir)
+    exists = os.path.exists(os.path.join(path, "meta.json"))
+    if not exists and not build:
+        raise FileNotFoundError(f"No panel for {timeframe} in {panel_dir}")
+    current = exists and panel_is_current(
+        path, build_kwargs.get('store_dir', STORE_DIR), build_kwargs.get('data_dir', DATA_DIR),
+        build_kwargs.get('planes', PLANES), build_kwargs.get('symbols'))
+    if build and not current:
+        build_panel(timeframe, panel_dir=panel_dir, **build_kwargs)
+    return UniversePanel(path)
+
+
+# ──── Main ─────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    start_time = time.time()
+    for tf in TIMEFRAMES:
+        path = build_panel(tf)
+        panel = UniversePanel(path)
+        print(f"✅ {tf}: {panel.shape[0]} candles x {panel.shape[1]} symbols -> {path}")
+    print(f"⏱ Total processing time: {time.time() - start_time:.2f} seconds")